@@ -0,0 +1,95 @@
+# benchmarks/load_serving.py
+"""
+Teste de carga do serviço de escoragem (src/serving.py / src/wsgi.py) já no ar:
+- taxa alvo fixa (--rps): cada conexão keep-alive envia no seu horário, sem esperar a fila (carga aberta),
+  então a latência medida inclui o tempo em fila no servidor
+- clientes em vários processos (--procs), para o cliente não virar o gargalo
+- reporta taxa obtida, p50/p95/p99/máx da latência (ms) e respostas com erro
+
+Uso (servidor rodando, ex.: gunicorn --pythonpath src -c src/gunicorn.conf.py wsgi:app):
+  python benchmarks/load_serving.py --url http://127.0.0.1:8000/score --rps 300 --seconds 20
+"""
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+PAYLOAD = json.dumps({"renda": 2500, "idade": 22, "score": 650, "valor": 30000}).encode()
+
+def _connection(url, latencies, errors, interval, start, stop):
+    u = urlparse(url)
+    conn = http.client.HTTPConnection(u.hostname, u.port, timeout=10)
+    headers = {"Content-Type": "application/json"}
+    due = start
+    while due < stop:
+        now = time.perf_counter()
+        if due > now:
+            time.sleep(due - now)
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", u.path, body=PAYLOAD, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(u.hostname, u.port, timeout=10)
+            ok = False
+        # latência a partir do horário agendado: atrasos do cliente/servidor contam
+        latencies.append(time.perf_counter() - min(t0, due))
+        if not ok:
+            errors.append(1)
+        due += interval
+    conn.close()
+
+def _client(args):
+    url, rps, connections, seconds, start_at = args
+    latencies, errors = [], []
+    interval = connections / rps
+    start = time.perf_counter() + max(0.0, start_at - time.time())
+    threads = [threading.Thread(target=_connection,
+                                args=(url, latencies, errors, interval, start + i * interval / connections,
+                                      start + seconds))
+               for i in range(connections)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, len(errors)
+
+def run(url, rps, seconds=20, connections=64, procs=4):
+    """
+    Carga aberta de rps requisições/s por seconds segundos. Retorna dict com as métricas.
+    """
+    per_proc = max(1, connections // procs)
+    start_at = time.time() + 1.0
+    with mp.Pool(procs) as pool:
+        parts = pool.map(_client, [(url, rps / procs, per_proc, seconds, start_at)] * procs)
+    lat = np.concatenate([np.asarray(p[0]) for p in parts]) * 1000.0
+    errors = sum(p[1] for p in parts)
+    return {
+        "target_rps": rps,
+        "rps": round(len(lat) / seconds, 1),
+        "requests": int(len(lat)),
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p95_ms": round(float(np.percentile(lat, 95)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "max_ms": round(float(lat.max()), 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de escoragem")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/score")
+    parser.add_argument("--rps", type=float, nargs="+", default=[300])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--procs", type=int, default=4)
+    args = parser.parse_args()
+    for rps in args.rps:
+        print(json.dumps(run(args.url, rps, args.seconds, args.connections, args.procs)))
@@ -0,0 +1,214 @@
+# benchmarks/run_benchmarks.py
+"""
+Suíte de benchmarks do pipeline, sobre dados sintéticos (benchmarks/synthetic_data.py):
+- etapas: process(), make_features(), make_features_partitioned() (um processo por núcleo), train(), escoragem em lote (score_file),
+  caminho do dashboard (uma linha por vez) e inferência PLN (predict_texts)
+- cada etapa roda em um processo novo (spawn), no diretório de trabalho do benchmark:
+  o pico de RSS medido é só daquela etapa, e nada fica em cache entre etapas
+- os módulos da etapa são importados antes de disparar o cronômetro (STAGE_IMPORTS)
+- cada etapa é repetida (--repeat) e vale a execução de tempo mediano (menos ruído na comparação)
+- resultados (tempo, linhas/s, pico de RSS) gravados em JSON, com o commit git
+- --compare base.json novo.json aponta regressões acima de um limite (código de saída 1)
+
+Uso:
+  python benchmarks/run_benchmarks.py --rows 10000 100000 --out benchmarks/results/atual.json
+  python benchmarks/run_benchmarks.py --compare benchmarks/results/base.json benchmarks/results/atual.json
+"""
+import argparse
+import importlib
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o RSS fica como None
+    resource = None
+
+STAGES = ["process", "make_features", "make_features_partitioned", "train", "score_batch", "dashboard_row", "pln_inference"]
+DASHBOARD_CALLS = 200
+PLN_TRAIN_ROWS = 20_000
+REPEAT = 3
+REGRESSION_THRESHOLD = 0.10  # 10% mais lento (ou mais memória) = regressão
+
+# módulos de cada etapa, importados antes de começar a medir (import de pandas/sklearn não é tempo da etapa)
+STAGE_IMPORTS = {
+    "process": ["data_processing"],
+    "make_features": ["feature_engineering"],
+    "make_features_partitioned": ["feature_engineering"],
+    "train": ["model"],
+    "score_batch": ["data_processing", "scoring", "storage"],
+    "dashboard_row": ["what_if"],
+    "pln_inference": ["pandas", "pln", "synthetic_data"],
+}
+
+def _rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024  # macOS em bytes, Linux em KB
+
+def _stage_process(rows):
+    from data_processing import process
+    process(save=True)
+    return rows
+
+def _stage_make_features(rows):
+    from feature_engineering import make_features
+    make_features(save=True)
+    return rows
+
+def _stage_make_features_partitioned(rows):
+    from feature_engineering import make_features_partitioned
+    make_features_partitioned(workers=os.cpu_count())
+    return rows
+
+def _stage_train(rows):
+    from model import train
+    train()
+    return rows
+
+def _stage_score_batch(rows):
+    from data_processing import OUT_PATH
+    from scoring import score_file
+    from storage import table_path
+    score_file(OUT_PATH, table_path("data/scores"))
+    return rows
+
+def _stage_dashboard_row(rows):
+    # mesmo caminho do dashboard.py: cenário de uma linha via what_if (renda muda: sempre calcula)
+    import what_if
+    what_if.load_model()
+    for i in range(DASHBOARD_CALLS):
+        what_if.scenario_risk({"renda": 3000.0 + i, "idade": 30, "score": 650, "valor": 20000.0,
+                               "meses_em_atraso": 0})
+    return DASHBOARD_CALLS
+
+def _stage_pln_inference(rows):
+    import pandas as pd
+    import pln
+    from synthetic_data import generate_texts
+    path = generate_texts("data/raw/textos_bench.csv", rows, rows)
+    df = pd.read_csv(path)
+    train = df.head(PLN_TRAIN_ROWS)
+    pln.train_text_classifier(train["texto"].tolist(), train["label"].tolist())
+    t0 = time.perf_counter()
+    pln.predict_texts(df["texto"].tolist(), entities=False)
+    return rows, time.perf_counter() - t0
+
+def _run_in_child(stage, rows, workdir, queue):
+    os.chdir(workdir)
+    for module in STAGE_IMPORTS.get(stage, []):
+        importlib.import_module(module)
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    try:
+        out = globals()[f"_stage_{stage}"](rows)
+        error = None
+    except Exception as e:
+        out, error = 0, f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - t0
+    cpu = time.process_time() - c0
+    # etapas que medem só a parte quente (ex.: PLN sem o treino) devolvem (linhas, segundos)
+    n, timed = out if isinstance(out, tuple) else (out, seconds)
+    rss_after = _rss_mb()
+    queue.put({"stage": stage, "rows": rows, "items": n, "seconds": round(timed, 4),
+               "total_seconds": round(seconds, 4), "cpu_seconds": round(cpu, 4),
+               "items_per_sec": round(n / timed, 1) if timed and n else None,
+               "baseline_rss_mb": round(rss_before, 1) if rss_before is not None else None,
+               "peak_rss_mb": round(rss_after, 1) if rss_after is not None else None, "error": error})
+
+def run_stage(stage, rows, workdir):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_in_child, args=(stage, rows, workdir, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def run_suite(sizes, stages=STAGES, workdir=None, seed=42, repeat=REPEAT):
+    """
+    Roda as etapas para cada tamanho de base. Retorna o dicionário de resultados.
+    """
+    from synthetic_data import generate
+
+    results = {"commit": _git_commit(), "created_at": datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(), "machine": platform.machine(), "runs": []}
+    for rows in sizes:
+        wd = workdir or tempfile.mkdtemp(prefix=f"bench_{rows}_")
+        os.makedirs(wd, exist_ok=True)
+        generate(os.path.join(wd, "data/raw/Loan_default.csv"), rows, seed=seed)
+        for stage in stages:
+            tries = sorted((run_stage(stage, rows, wd) for _ in range(repeat)), key=lambda t: t["seconds"])
+            r = dict(tries[len(tries) // 2])
+            r["seconds_all"] = [t["seconds"] for t in tries]
+            results["runs"].append(r)
+            status = f"ERRO {r['error']}" if r["error"] else f"{r['items_per_sec']} itens/s, pico RSS {r['peak_rss_mb']} MB"
+            print(f"[{rows:>10}] {stage:<25} {r['seconds']:>9.3f}s  {status}")
+    return results
+
+def compare(base, new, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara dois arquivos de resultados (mesma etapa e tamanho). Retorna a lista de regressões.
+    """
+    index = {(r["stage"], r["rows"]): r for r in base["runs"] if not r["error"]}
+    regressions = []
+    print(f"base {base.get('commit')} -> novo {new.get('commit')}")
+    for r in new["runs"]:
+        b = index.get((r["stage"], r["rows"]))
+        if b is None or r["error"]:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if not b.get(metric) or r.get(metric) is None:
+                continue
+            change = r[metric] / b[metric] - 1
+            flag = change > threshold
+            print(f"  {r['stage']:<25} {r['rows']:>10} {metric:<12} {b[metric]:>10} -> {r[metric]:>10} "
+                  f"({change:+.1%}){'  REGRESSÃO' if flag else ''}")
+            if flag:
+                regressions.append((r["stage"], r["rows"], metric, change))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline sobre dados sintéticos")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="tamanhos de base (ex.: 10000 1000000)")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--workdir", default=None, help="diretório de trabalho (padrão: temporário por tamanho)")
+    parser.add_argument("--out", default=None, help="arquivo JSON de resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NOVO"), help="compara dois arquivos de resultados")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="execuções por etapa (vale a mediana)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            new = json.load(f)
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+    results = run_suite(args.rows, args.stages, args.workdir, repeat=args.repeat)
+    out = args.out or os.path.join(ROOT, "benchmarks", "results", f"{results['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultados salvos em: {out}")
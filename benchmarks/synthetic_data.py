@@ -0,0 +1,95 @@
+# benchmarks/synthetic_data.py
+"""
+Gerador offline de dados sintéticos de empréstimos, no schema de COL_MAP_CANDIDATES
+(src/data_processing.py): LoanID, income, Age, credit_score, loan_amount, months_late, default.
+- gerado e gravado em chunks: de 10 mil a dezenas de milhões de linhas com memória constante
+- reprodutível (seed), com nulos e target em texto (yes/no) como no CSV real
+- default sorteado de uma logística sobre as variáveis, para o treino ter sinal
+- generate_texts: corpus de textos de clientes (contrato, texto, data) para pln/text_features
+
+Uso: python benchmarks/synthetic_data.py data/raw/Loan_default.csv --rows 1000000
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 1_000_000
+MISSING_RATE = 0.02
+
+NEGATIVE_TEXTS = ["não vou pagar essa cobrança", "estou sem dinheiro este mês", "reclamação de cobrança abusiva",
+                  "atraso no pagamento por desemprego", "cobrança indevida, vou abrir reclamação"]
+POSITIVE_TEXTS = ["pagamento efetuado hoje", "vou quitar a parcela amanhã", "obrigado pelo acordo",
+                  "boleto pago pelo aplicativo", "acordo fechado, obrigado pelo atendimento"]
+
+def _chunk(rng, start, n, missing_rate):
+    income = np.round(rng.lognormal(mean=8.3, sigma=0.6, size=n), 2)      # renda mensal (~R$ 4 mil)
+    age = rng.integers(18, 70, size=n)
+    score = np.clip(rng.normal(650, 90, size=n), 300, 850).round()
+    amount = np.round(rng.lognormal(mean=10.0, sigma=0.7, size=n), 2)
+    months_late = rng.poisson(0.4, size=n)
+    z = (-1.2 + 0.9 * (amount / (income * 12) - 0.6) - 0.012 * (score - 650) - 0.02 * (age - 40)
+         + 0.5 * np.minimum(months_late, 4))
+    default = np.where(rng.random(n) < 1 / (1 + np.exp(-z)), "yes", "no")
+    df = pd.DataFrame({
+        "LoanID": np.arange(start, start + n),
+        "income": income,
+        "Age": age.astype(np.float64),
+        "credit_score": score,
+        "loan_amount": amount,
+        "months_late": months_late,
+        "default": default,
+    })
+    for col in ("income", "Age", "credit_score"):
+        df.loc[rng.random(n) < missing_rate, col] = np.nan
+    return df
+
+def generate(path, rows, chunksize=CHUNK_SIZE, seed=42, missing_rate=MISSING_RATE):
+    """
+    Grava `rows` linhas sintéticas em CSV, em chunks. Retorna o caminho.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            n = min(chunksize, rows - written)
+            _chunk(rng, written, n, missing_rate).to_csv(f, index=False, header=(written == 0))
+            written += n
+    print(f"Dados sintéticos: {rows} linhas em {path}")
+    return path
+
+def generate_texts(path, rows, n_contracts, seed=42, chunksize=CHUNK_SIZE):
+    """
+    Corpus de textos de clientes (contrato, texto, data, label) em CSV, em chunks.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rng = np.random.default_rng(seed)
+    texts = np.array(NEGATIVE_TEXTS + POSITIVE_TEXTS)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            n = min(chunksize, rows - written)
+            idx = rng.integers(0, len(texts), size=n)
+            pd.DataFrame({
+                "contrato": rng.integers(0, n_contracts, size=n),
+                "texto": texts[idx],
+                "data": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 365, size=n)), unit="D"),
+                "label": np.where(idx < len(NEGATIVE_TEXTS), "negativo", "positivo"),
+            }).to_csv(f, index=False, header=(written == 0))
+            written += n
+    print(f"Textos sintéticos: {rows} linhas em {path}")
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de empréstimos")
+    parser.add_argument("output", help="CSV de saída")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--texts", default=None, help="também gera um corpus de textos neste caminho")
+    args = parser.parse_args()
+    generate(args.output, args.rows, chunksize=args.chunksize, seed=args.seed)
+    if args.texts:
+        generate_texts(args.texts, args.rows, args.rows, seed=args.seed)
@@ -1,16 +1,25 @@
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
-import joblib
 import plotly.express as px
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+import what_if
+
 # ============================
 # 1) CARREGAR MODELO
 # ============================
 
-MODEL_PATH = "models/model_pipeline_noleak.pkl"
+# O Streamlit reexecuta o script a cada interação, mas os módulos importados continuam carregados:
+# what_if guarda o modelo da versão em uso (carregado uma vez por processo) e os riscos calculados
+# no cache LRU (chave: versão do modelo + entradas)
 
 try:
-    model = joblib.load(MODEL_PATH)
+    version = what_if.current_version()
+    what_if.load_model(version)
 except Exception as e:
     st.error(f"❌ Erro ao carregar o modelo: {e}")
     st.stop()
@@ -39,69 +48,28 @@ valor = st.sidebar.number_input("Valor financiado (R$)", min_value=0, max_value=
 meses = st.sidebar.number_input("Meses em atraso", min_value=0, max_value=24, value=0)
 
 # ============================
-# 4) CRIAÇÃO DAS FEATURES IGUAIS AO TREINO
-# ============================
-
-df = pd.DataFrame({
-    "renda": [renda],
-    "idade": [idade],
-    "score": [score],
-    "valor": [valor],
-    "meses_atraso": [meses]
-})
-
-# Features derivadas
-df["loan_to_income"] = (valor / renda) if renda > 0 else 0
-df["estimated_monthly_payment"] = valor / 12
-df["pct_income_commitment"] = (df["estimated_monthly_payment"] / renda) if renda > 0 else 0
-
-# Buckets
-df["age_bucket"] = pd.cut(
-    df["idade"],
-    bins=[0, 25, 40, 200],
-    labels=["jovem", "adulto", "senior"]
-)
-
-df["score_bucket"] = pd.cut(
-    df["score"],
-    bins=[0, 400, 700, 1000],
-    labels=["baixo", "medio", "alto"]
-)
-
-# One-Hot Encoding
-df = pd.get_dummies(df)
-
-# ============================
-# 5) AJUSTAR COLUNAS PARA O MODELO
+# 4) CENÁRIO (features e predição ficam em what_if, com cache)
 # ============================
 
-# Pegamos as colunas EXATAMENTE como no modelo
-model_cols = model.feature_names_in_
-
-# Criar colunas faltantes
-for col in model_cols:
-    if col not in df.columns:
-        df[col] = 0
-
-# Garantir ordem exata
-df = df[model_cols]
+# Mesmo transformador usado no treino (salvo junto com o modelo);
+# features de texto, se o modelo usar: candidato novo sem histórico de textos -> 0
+base = {"renda": renda, "idade": idade, "score": score, "valor": valor, "meses_em_atraso": meses}
 
 # ============================
-# 6) PREDIÇÃO
+# 5) PREDIÇÃO
 # ============================
 
 st.subheader("📊 Resultado da Predição")
 
 if st.sidebar.button("🔍 Calcular Risco"):
     try:
-        pred = model.predict(df)[0]
+        proba = what_if.scenario_risk(base, version=version)
 
-        if pred == 0:
-            st.success("💰 **ADIMPLENTE (0)** — baixa probabilidade de inadimplência.")
-        elif pred == 3:
-            st.error("⚠️ **INADIMPLENTE (3)** — alta probabilidade.")
+        # mesmo limiar do predict do modelo (classe 1 se a probabilidade passa de 50%)
+        if proba <= 0.5:
+            st.success(f"💰 **ADIMPLENTE (0)** — baixa probabilidade de inadimplência ({proba:.1%}).")
         else:
-            st.warning(f"Resultado inesperado: {pred}")
+            st.error(f"⚠️ **INADIMPLENTE (1)** — alta probabilidade ({proba:.1%}).")
     except Exception as e:
         st.error(f"❌ Erro ao realizar predição: {e}")
 
@@ -111,7 +79,7 @@ else:
 st.markdown("---")
 
 # ============================
-# 7) GRÁFICO DAS FEATURES
+# 6) GRÁFICO DAS FEATURES
 # ============================
 
 st.subheader("📈 Valores Informados")
@@ -123,3 +91,34 @@ base_plot = {
 
 fig = px.bar(base_plot, x="Variável", y="Valor", title="Informações do Estudante", text="Valor")
 st.plotly_chart(fig, use_container_width=True)
+
+# ============================
+# 7) ANÁLISE WHAT-IF
+# ============================
+
+st.markdown("---")
+st.subheader("🧪 Análise What-if")
+
+LABELS = {"renda": "Renda Mensal (R$)", "idade": "Idade", "score": "Score de Crédito",
+          "valor": "Valor financiado (R$)", "meses_em_atraso": "Meses em atraso"}
+
+# mapa de calor: score × renda, com as demais variáveis (inclusive o valor financiado) fixas
+grid = what_if.risk_grid(base, "score", what_if.GRID_AXES["score"], "renda", what_if.GRID_AXES["renda"],
+                         version=version)
+heat = px.imshow(grid, x=what_if.GRID_AXES["score"], y=what_if.GRID_AXES["renda"], origin="lower",
+                 aspect="auto", color_continuous_scale="RdYlGn_r", zmin=0, zmax=1,
+                 labels={"x": LABELS["score"], "y": LABELS["renda"], "color": "Risco"},
+                 title=f"Risco por score e renda (valor financiado fixo em R$ {valor:,.0f})")
+st.plotly_chart(heat, use_container_width=True)
+
+# curvas de sensibilidade: uma variável por vez, as outras nos valores informados
+curves = what_if.sensitivity(base, version=version)
+cols = st.columns(len(curves))
+for col, (name, (xs, risk)) in zip(cols, curves.items()):
+    fig = px.line(pd.DataFrame({LABELS[name]: xs, "Risco": risk}), x=LABELS[name], y="Risco", range_y=[0, 1])
+    fig.add_vline(x=base[name], line_dash="dash")
+    col.plotly_chart(fig, use_container_width=True)
+
+info = what_if.cache_info()
+st.caption(f"Modelo {version} · cache de cenários: {info.currsize}/{info.maxsize} entradas, "
+           f"{info.hits} acertos, {info.misses} cálculos")
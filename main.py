@@ -1,29 +1,45 @@
 # main.py
+import argparse
 import os
-import subprocess
 import sys
+import traceback
+from datetime import datetime
 
-def run_script(script_path):
-    print(f"\n>>> INICIANDO: {script_path}")
-    result = subprocess.run([sys.executable, script_path], capture_output=False, text=True, check=False)
-    if result.returncode != 0:
-        print(f"\n ERRO: O script {script_path} falhou com código de saída {result.returncode}. Parando o pipeline.")
-        sys.exit(result.returncode)
-    print(f"\n SUCESSO: {script_path} concluído.")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from pipeline import run_pipeline
 
 if __name__ == "__main__":
-    scripts = [
-        "src/data_collection.py",
-        "src/data_processing.py",
-        "src/feature_engineering.py",
-        "src/model.py"
-    ]
+    parser = argparse.ArgumentParser(description="Pipeline: Coleta -> Processamento -> Features -> Treino")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="grava os arquivos intermediários em data/processed e data/features")
+    parser.add_argument("--streaming", action="store_true",
+                        help="processa o CSV bruto em chunks, com memória limitada")
+    parser.add_argument("--force", action="store_true",
+                        help="ignora o cache de etapas e reconstrói tudo")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="não usa nem grava o cache de etapas (data/cache)")
+    parser.add_argument("--search", action="store_true",
+                        help="busca de hiperparâmetros no treino (leaderboard em models/)")
+    parser.add_argument("--report", default=None,
+                        help="relatório JSON da execução (padrão: reports/run_<data-hora>.json)")
+    parser.add_argument("--profile", action="store_true",
+                        help="captura cProfile de cada etapa (reports/profiles/)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="mede a memória de cada passo com tracemalloc (exato, porém bem mais lento)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos na etapa de features (> 1 = particionada, em paralelo)")
+    args = parser.parse_args()
+    report_path = args.report or os.path.join("reports", f"run_{datetime.now():%Y%m%d-%H%M%S}.json")
 
-    for s in scripts:
-        if not os.path.exists(s):
-            print(f"Aviso: script {s} não encontrado. Verifique os nomes.")
     print("\nINICIANDO PIPELINE: Coleta -> Processamento -> Features -> Treino")
-    for s in scripts:
-        run_script(s)
+    try:
+        run_pipeline(checkpoint=args.checkpoint, streaming=args.streaming,
+                     use_cache=not args.no_cache, force=args.force, search=args.search,
+                     report_path=report_path, profile=args.profile, workers=args.workers,
+                     trace_memory=args.trace_memory)
+    except Exception as e:
+        print(f"\n ERRO: {e}")
+        traceback.print_exc()
+        sys.exit(1)
     print("\nPIPELINE FINALIZADO COM SUCESSO!")
- 
\ No newline at end of file
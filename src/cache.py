@@ -0,0 +1,99 @@
+# src/cache.py
+"""
+Cache incremental de etapas do pipeline:
+- cada etapa tem uma chave = hash(entradas + parâmetros + versão do código)
+- se a chave não mudou desde a última execução, a etapa é pulada e o artefato reaproveitado
+- hashes de arquivos grandes são memorizados por (tamanho, mtime) para não reler o arquivo
+- manifesto em data/cache/manifest.json (uma entrada por etapa)
+"""
+import hashlib
+import inspect
+import json
+import os
+
+CACHE_DIR = "data/cache"
+HASHES_PATH = os.path.join(CACHE_DIR, "file_hashes.json")
+
+def _read_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def file_hash(path, block_size=1 << 20):
+    """
+    sha256 do conteúdo do arquivo (memorizado por tamanho + mtime).
+    Retorna None se o arquivo não existir.
+    """
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    stamp = f"{st.st_size}:{st.st_mtime_ns}"
+    memo = _read_json(HASHES_PATH)
+    entry = memo.get(os.path.abspath(path))
+    if entry and entry.get("stamp") == stamp:
+        return entry["sha256"]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    memo[os.path.abspath(path)] = {"stamp": stamp, "sha256": h.hexdigest()}
+    _write_json(HASHES_PATH, memo)
+    return h.hexdigest()
+
+def code_hash(*modules):
+    """
+    Hash do código-fonte dos módulos (versão do código da etapa).
+    """
+    h = hashlib.sha256()
+    for m in modules:
+        h.update(inspect.getsource(m).encode("utf-8"))
+    return h.hexdigest()
+
+def stage_key(*parts):
+    """
+    Combina entradas/parâmetros/código em uma chave (serialização JSON estável).
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class StageCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest = _read_json(self.manifest_path)
+
+    def artifact_path(self, stage, ext="parquet"):
+        return os.path.join(self.cache_dir, f"{stage}.{ext}")
+
+    def is_fresh(self, stage, key):
+        """
+        True se a etapa já foi executada com esta chave (e o artefato, se houver, ainda existe).
+        """
+        entry = self.manifest.get(stage)
+        if not entry or entry.get("key") != key:
+            return False
+        artifact = entry.get("artifact")
+        return artifact is None or os.path.exists(artifact)
+
+    def record(self, stage, key, artifact=None):
+        """
+        Registra que a etapa foi executada com esta chave (artifact = arquivo gerado, opcional).
+        """
+        self.manifest[stage] = {"key": key, "artifact": artifact}
+        _write_json(self.manifest_path, self.manifest)
+
+    def invalidate(self, stage):
+        if self.manifest.pop(stage, None) is not None:
+            _write_json(self.manifest_path, self.manifest)
@@ -0,0 +1,109 @@
+# src/compiled_scorer.py
+"""
+Escoragem só com NumPy a partir do artefato compilado (models/model_noleak_compiled.npz,
+gerado por model.export_compiled). Reproduz o predict_proba do pipeline sklearn:
+  imputação (mediana) -> (x - média) / escala -> one-hot (categorias desconhecidas = zeros) -> logística
+Não importa sklearn nem pandas: inicialização rápida para workers de escoragem.
+score_raw() parte das colunas processadas (renda, idade, score, valor) usando o mesmo
+FeatureTransformer do treino, salvo no artefato.
+O artefato pode ser um .npz ou um diretório de .npy (registro de modelos); no diretório os
+arrays são abertos com memory-map, então vários processos compartilham uma única cópia.
+"""
+import os
+
+import numpy as np
+
+from feature_transformer import FeatureTransformer
+
+COMPILED_PATH = "models/model_noleak_compiled.npz"
+
+def open_arrays(path):
+    """
+    Lê o artefato compilado: .npz (carregado) ou diretório de .npy (memory-map, somente leitura).
+    """
+    if os.path.isdir(path):
+        return {f[:-4]: np.load(os.path.join(path, f), mmap_mode="r", allow_pickle=False)
+                for f in os.listdir(path) if f.endswith(".npy")}
+    with np.load(path, allow_pickle=False) as z:
+        return dict(z)
+
+def save_arrays(arrays, path):
+    """
+    Grava os arrays como diretório de .npy (um por chave), o formato que permite memory-map.
+    """
+    os.makedirs(path, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.asarray(arr), allow_pickle=False)
+    return path
+
+class CompiledScorer:
+    def __init__(self, path=COMPILED_PATH):
+        self.path = path
+        z = open_arrays(path)
+        self.num_features = [str(c) for c in z["num_features"]]
+        self.cat_features = [str(c) for c in z["cat_features"]]
+        coef = z["coef"]
+        self.intercept = float(z["intercept"])
+        n_num = len(self.num_features)
+        if n_num:
+            self.num_medians = z["num_medians"]
+            self.num_means = z["num_means"]
+            self.num_scales = z["num_scales"]
+            self.num_weights = coef[:n_num]
+        # coeficientes do one-hot por variável, com um slot extra (0) para categoria desconhecida
+        self.cat_fill = [str(v) for v in z["cat_fill"]] if self.cat_features else []
+        self.categories, self.cat_weights = [], []
+        start = n_num
+        for i in range(len(self.cat_features)):
+            cats = z[f"cat_{i}"]
+            self.categories.append(cats)
+            self.cat_weights.append(np.append(coef[start:start + len(cats)], 0.0))
+            start += len(cats)
+        self.transformer = FeatureTransformer.from_arrays(z) if "fe_renda_median" in z else FeatureTransformer()
+
+    @property
+    def feature_names(self):
+        return self.num_features + self.cat_features
+
+    def _cat_index(self, i, values):
+        cats = self.categories[i]
+        v = np.asarray(values, dtype=object)
+        missing = (v == None) | (v != v)  # noqa: E711 — None/NaN elemento a elemento
+        v = np.where(missing, self.cat_fill[i], v).astype(str)
+        idx = np.searchsorted(cats, v)
+        idx = np.minimum(idx, len(cats) - 1) if len(cats) else idx
+        found = (cats[idx] == v) if len(cats) else np.zeros(len(v), dtype=bool)
+        return np.where(found, idx, len(cats))
+
+    def decision_function(self, columns):
+        """
+        columns: {nome_da_feature: array-like}, com todas as features de feature_names.
+        """
+        z = None
+        if self.num_features:
+            X = np.column_stack([np.asarray(columns[c], dtype=np.float64) for c in self.num_features])
+            X = np.where(np.isnan(X), self.num_medians, X)
+            z = ((X - self.num_means) / self.num_scales) @ self.num_weights
+        for i, c in enumerate(self.cat_features):
+            contrib = self.cat_weights[i][self._cat_index(i, columns[c])]
+            z = contrib if z is None else z + contrib
+        return z + self.intercept
+
+    def predict_proba(self, columns):
+        """
+        Retorna array (n, 2) como o predict_proba do sklearn.
+        """
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(columns)))
+        return np.column_stack([1.0 - p, p])
+
+    def score_raw(self, columns):
+        """
+        Probabilidade de inadimplência a partir das colunas processadas ({'renda': [...], ...}).
+        Features que o transformer não calcula (ex.: de texto) são lidas de columns; ausentes valem 0.
+        """
+        feats = self.transformer.transform_arrays(columns)
+        n = len(next(iter(columns.values()))) if columns else 0
+        for c in self.num_features:
+            if c not in feats:
+                feats[c] = np.nan_to_num(np.asarray(columns[c], dtype=np.float64)) if c in columns else np.zeros(n)
+        return self.predict_proba(feats)[:, 1]
@@ -2,26 +2,46 @@
 """
 Coleta de dados:
 - copia Loan_default.csv para data/raw/ (se necessário)
-- consulta ao Banco Central (SGS) para indicadores macroeconômicos (ex.: SELIC/IPCA)
+- consulta ao Banco Central (SGS) para indicadores macroeconômicos (ex.: SELIC/IPCA),
+  em paralelo, com cache em disco e busca incremental (só datas após a última observação)
 - salva indicadores em data/raw/macros_bcb.csv
 """
 import os
 import shutil
 import pandas as pd
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 RAW_DIR = "data/raw"
 os.makedirs(RAW_DIR, exist_ok=True)
 SRC_CANDIDATES = ["/mnt/data/Loan_default.csv", "Loan_default.csv", os.path.join(RAW_DIR, "Loan_default.csv")]
 DEST = os.path.join(RAW_DIR, "Loan_default.csv")
 
+SGS_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_id}/dados"
+MACRO_SERIES = ["432", "433"]  # placeholders; 432/433 may correspond to different series; code tolera falha
+MACRO_START = "2018-01-01"
+MACRO_CACHE_DIR = os.path.join(RAW_DIR, "sgs_cache")
+MAX_WORKERS = 8
+
+def _same_file_stamp(src, dest):
+    if not os.path.exists(dest):
+        return False
+    a, b = os.stat(src), os.stat(dest)
+    return a.st_size == b.st_size and int(a.st_mtime) == int(b.st_mtime)
+
 def copy_local_csv():
     for p in SRC_CANDIDATES:
         if os.path.exists(p):
             if os.path.abspath(p) != os.path.abspath(DEST):
+                if _same_file_stamp(p, DEST):
+                    print(f"Arquivo {DEST} já está atualizado (mesmo tamanho e data). Cópia pulada.")
+                    return True
                 try:
-                    shutil.copyfile(p, DEST)
+                    # copy2 preserva o mtime, permitindo pular a cópia na próxima execução
+                    shutil.copy2(p, DEST)
                     print(f"Arquivo copiado de {p} -> {DEST}")
                 except Exception as e:
                     print(f"Aviso: não foi possível copiar {p} -> {e}")
@@ -31,35 +51,93 @@ def copy_local_csv():
     print("Arquivo Loan_default.csv não encontrado em locais padrão. Coloque-o em data/raw/")
     return False
 
-def fetch_bcb_series(series_id="432", start_date="2018-01-01", end_date=None):
+def make_session(pool_size=MAX_WORKERS, retries=3, backoff=0.5):
+    """
+    Sessão HTTP com pool de conexões e retry com backoff exponencial
+    (erros de conexão e respostas 429/5xx).
+    """
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_bcb_series(series_id="432", start_date="2018-01-01", end_date=None, session=None, base_url=None):
     """
     Busca série do SGS (Banco Central). Ex.: 432 (SELIC meta) — ajuste se quiser outro indicador.
+    start_date/end_date no formato AAAA-MM-DD (a API recebe dd/mm/aaaa).
+    base_url permite apontar para outro servidor (ex.: um stand-in local da API).
     Retorna DataFrame com colunas ['data','valor'].
     """
     if end_date is None:
         end_date = datetime.now().strftime("%Y-%m-%d")
-    url = f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_id}/dados?formato=json&dataInicial={start_date}&dataFinal={end_date}"
+    url = (base_url or SGS_URL).format(series_id=series_id)
+    params = {
+        "formato": "json",
+        "dataInicial": pd.Timestamp(start_date).strftime("%d/%m/%Y"),
+        "dataFinal": pd.Timestamp(end_date).strftime("%d/%m/%Y"),
+    }
     try:
-        resp = requests.get(url, timeout=15)
+        resp = (session or requests).get(url, params=params, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         df = pd.DataFrame(data)
         if not df.empty:
-            df['data'] = pd.to_datetime(df['data'], dayfirst=False)
-            df['valor'] = pd.to_numeric(df['valor'].str.replace(',','.'), errors='coerce')
+            df['data'] = pd.to_datetime(df['data'], dayfirst=True)
+            df['valor'] = pd.to_numeric(df['valor'].astype(str).str.replace(',','.'), errors='coerce')
             return df[['data','valor']]
     except Exception as e:
         print(f"Aviso: falha ao buscar série {series_id} no BCB: {e}")
     return pd.DataFrame()
 
-def save_macros():
+def update_series(series_id, start_date=MACRO_START, session=None, base_url=None, cache_dir=MACRO_CACHE_DIR):
+    """
+    Atualização incremental de uma série com cache em disco:
+    lê o cache, busca só as datas após a última observação e junta ao cache.
+    Retorna o DataFrame completo ['data','valor'].
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"sgs_{series_id}.csv")
+    cached = pd.read_csv(path, parse_dates=['data']) if os.path.exists(path) else pd.DataFrame()
+
+    since = start_date
+    if not cached.empty:
+        since = (cached['data'].max() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        if since > datetime.now().strftime("%Y-%m-%d"):
+            return cached
+
+    new = fetch_bcb_series(series_id=series_id, start_date=since, session=session, base_url=base_url)
+    if new.empty:
+        return cached
+    df = pd.concat([cached, new], ignore_index=True) if not cached.empty else new
+    df = df.drop_duplicates(subset='data', keep='last').sort_values('data').reset_index(drop=True)
+    df.to_csv(path, index=False)
+    print(f"Série {series_id}: {len(new)} novas observações (desde {since})")
+    return df
+
+def fetch_macros(series_ids=MACRO_SERIES, start_date=MACRO_START, max_workers=MAX_WORKERS, base_url=None,
+                 cache_dir=MACRO_CACHE_DIR):
+    """
+    Atualiza várias séries em paralelo (threads) sobre uma sessão com pool de conexões.
+    Retorna {series_id: DataFrame}.
+    """
+    session = make_session(pool_size=max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = {s: ex.submit(update_series, s, start_date, session, base_url, cache_dir) for s in series_ids}
+            return {s: f.result() for s, f in futures.items()}
+    finally:
+        session.close()
+
+def save_macros(series_ids=MACRO_SERIES, base_url=None):
     # tentar 2 séries (exemplo): SELIC meta (4389?) e IPCA (433?) -> se não souber a série exata, manter genérica
-    # Observação: ajuste series_id conforme necessidade; este código tenta 1 e devolve o que conseguir.
-    series_to_try = ["432", "433"]  # placeholders; 432/433 may correspond to different series; code tolera falha
+    # Observação: ajuste MACRO_SERIES conforme necessidade; este código tolera falha e devolve o que conseguir.
     out = []
-    for s in series_to_try:
-        df = fetch_bcb_series(series_id=s, start_date="2018-01-01")
+    for s, df in fetch_macros(series_ids, base_url=base_url).items():
         if not df.empty:
+            df = df.copy()
             df['series_id'] = s
             out.append(df)
     if out:
@@ -67,8 +145,9 @@ def save_macros():
         path = os.path.join(RAW_DIR, "macros_bcb.csv")
         df_all.to_csv(path, index=False)
         print(f"Indicadores macro salvos em: {path}")
-    else:
-        print("Nenhum indicador macro foi salvo (APIs falharam ou retornaram vazio).")
+        return True
+    print("Nenhum indicador macro foi salvo (APIs falharam ou retornaram vazio).")
+    return False
 
 if __name__ == "__main__":
     copy_local_csv()
@@ -1,16 +1,22 @@
 # src/data_processing.py
 """
 Processamento básico do CSV de empréstimos -> normalização de colunas, tipos e limpeza.
-Produz: data/processed/loan_clean.csv
+Produz: data/processed/loan_clean.parquet (ou .csv se pyarrow não estiver instalado)
+Tipos compactos (float32/int8) conforme src/dtypes.py, desde a leitura do CSV.
 """
 import pandas as pd
 import os
 import numpy as np
 
+import dtypes
+from storage import table_path, save_table, TableWriter
+from sketches import QuantileSketch
+from tracing import span
+
 RAW_PATH = 'data/raw/Loan_default.csv'
 PROCESSED_DIR = 'data/processed'
 os.makedirs(PROCESSED_DIR, exist_ok=True)
-OUT_PATH = os.path.join(PROCESSED_DIR, 'loan_clean.csv')
+OUT_PATH = table_path(os.path.join(PROCESSED_DIR, 'loan_clean'))
 
 # Mapeamentos de possíveis nomes de colunas no CSV
 COL_MAP_CANDIDATES = {
@@ -19,7 +25,23 @@ COL_MAP_CANDIDATES = {
     'score': ['score', 'credit_score', 'fico', 'credit_score_value'],
     'valor': ['loan_amount', 'valor', 'loan_value', 'amount'],
     'meses_em_atraso': ['months_delayed', 'months_in_arrears', 'num_late_payments', 'months_late'],
-    'target': ['default', 'delinquent', 'is_default', 'target']
+    'target': ['default', 'delinquent', 'is_default', 'target'],
+    'contrato': ['contrato', 'id_contrato', 'contract_id', 'loan_id', 'loanid']
+}
+
+ESSENTIALS = ['renda','idade','score','valor','meses_em_atraso','target']
+# chave do contrato (opcional): mantida no processado para juntar dados externos (ex.: features de texto)
+ID_COL = 'contrato'
+NUMERIC_COLS = ['renda','valor','score','meses_em_atraso','idade']
+# valores usados quando a coluna inteira está vazia
+FILL_DEFAULTS = {'renda': 0, 'idade': 25, 'score': 600, 'valor': 10000}
+CHUNK_SIZE = 500_000
+
+# Tabela de normalização do target (valor bruto, após strip -> 0/1).
+# Ajuste/passe outra tabela (target_map=...) para fontes com outras convenções.
+TARGET_VALUE_MAP = {
+    **{v: 1 for v in ['1','True','true','YES','yes','Y','y']},
+    **{v: 0 for v in ['0','False','false','NO','no','N','n']},
 }
 
 def find_column(df, candidates):
@@ -28,24 +50,20 @@ def find_column(df, candidates):
             return c
     return None
 
-def process():
-    if not os.path.exists(RAW_PATH):
-        print(f"Arquivo bruto não encontrado em {RAW_PATH}. Rode src/data_collection.py primeiro.")
-        return False
-
-    df = pd.read_csv(RAW_PATH)
-    df_columns_lower = [c.lower() for c in df.columns]
-
-    # construir novo df com colunas padronizadas
+def detect_mapping(columns):
+    """
+    Detecta, para cada coluna padronizada, a coluna correspondente no CSV bruto.
+    Retorna {coluna_padrao: coluna_original ou None}.
+    """
     mapped = {}
     for std, candidates in COL_MAP_CANDIDATES.items():
         col = None
         for cand in candidates:
-            if cand in df.columns:
+            if cand in columns:
                 col = cand
                 break
             # try lowercase match
-            for orig in df.columns:
+            for orig in columns:
                 if orig.lower() == cand.lower():
                     col = orig
                     break
@@ -58,54 +76,182 @@ def process():
         print(f"  {k}: {v}")
 
     # verificar colunas essenciais
-    essentials = ['renda','idade','score','valor','meses_em_atraso','target']
-    missing = [k for k in essentials if mapped.get(k) is None]
+    missing = [k for k in ESSENTIALS if mapped.get(k) is None]
     if missing:
         print("Aviso: as colunas essenciais não foram todas encontradas:", missing)
         print("Se o seu CSV usa nomes diferentes, ajuste os mapeamentos em src/data_processing.py")
         # não aborta, tenta prosseguir com o que tiver
+    return mapped
+
+def normalize_target(s, value_map=None):
+    """
+    Normaliza o target para 0/1 de forma vetorizada.
+    - bool/numérico: conversão direta
+    - texto: fatoriza (uma consulta à tabela por valor distinto, não por linha)
+    Valores fora da tabela são convertidos para número quando possível; o resto vira 0.
+    Retorna (Series int, quantidade de valores não mapeados).
+    """
+    if value_map is None:
+        value_map = TARGET_VALUE_MAP
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+        values = pd.to_numeric(s, errors='coerce')
+    else:
+        codes, uniques = pd.factorize(s)
+        lookup = np.empty(len(uniques) + 1, dtype=np.float64)
+        for i, u in enumerate(uniques):
+            key = str(u).strip()
+            if key in value_map:
+                lookup[i] = value_map[key]
+            else:
+                lookup[i] = pd.to_numeric(key, errors='coerce')
+        lookup[-1] = np.nan  # código -1 (nulo) -> último slot
+        values = pd.Series(lookup[codes], index=s.index)
+    unmapped = int(values.isna().sum())
+    return values.fillna(0).astype(int), unmapped
 
+def standardize(df, mapped, verbose=True, target_map=None):
+    """
+    Constrói o DataFrame padronizado (colunas, tipos e target), sem imputação.
+    Funciona tanto no arquivo inteiro quanto em um chunk.
+    """
     # construir dataframe padronizado
-    df2 = pd.DataFrame()
-    for std in ['renda','idade','score','valor','meses_em_atraso','target']:
+    df2 = pd.DataFrame(index=df.index)
+    for std in ESSENTIALS:
         colname = mapped.get(std)
         if colname is not None:
             df2[std] = df[colname]
         else:
             # se faltar, preencher com NaNs
             df2[std] = np.nan
+    if mapped.get(ID_COL) is not None:
+        df2.insert(0, ID_COL, df[mapped[ID_COL]])
 
     # Tipos e limpeza
     # renda e valor -> numérico (R$)
-    for c in ['renda','valor','score','meses_em_atraso','idade']:
-        if c in df2.columns:
-            df2[c] = pd.to_numeric(df2[c], errors='coerce')
+    for c in NUMERIC_COLS:
+        df2[c] = pd.to_numeric(df2[c], errors='coerce')
 
     # target -> binário 0/1
     if 'target' in df2.columns:
-        df2['target'] = df2['target'].map(lambda x: 1 if str(x).strip() in ['1','True','true','YES','yes','Y','y'] else (0 if str(x).strip() in ['0','False','false','NO','no','N','n'] else x))
-        df2['target'] = pd.to_numeric(df2['target'], errors='coerce').fillna(0).astype(int)
+        df2['target'], unmapped = normalize_target(df2['target'], target_map)
+        df2.attrs['target_unmapped'] = unmapped
+        if unmapped and verbose:
+            print(f"Aviso: {unmapped} valores de target não puderam ser mapeados (preenchidos com 0)")
     else:
         # se não houver target, cria um proxy (meses_em_atraso >=3)
         if 'meses_em_atraso' in df2.columns:
             df2['target'] = (df2['meses_em_atraso'] >= 3).astype(int)
-            print("Target não encontrado: criando proxy target = meses_em_atraso >= 3")
+            if verbose:
+                print("Target não encontrado: criando proxy target = meses_em_atraso >= 3")
         else:
             df2['target'] = 0
-            print("Nenhuma coluna de target ou meses em atraso encontrada. Target preenchido com zeros.")
+            if verbose:
+                print("Nenhuma coluna de target ou meses em atraso encontrada. Target preenchido com zeros.")
+    return df2
 
-    # preencher nulos razoavelmente
-    df2['renda'] = df2['renda'].fillna(df2['renda'].median() if not df2['renda'].isna().all() else 0)
-    df2['idade'] = df2['idade'].fillna(df2['idade'].median() if not df2['idade'].isna().all() else 25)
-    df2['score'] = df2['score'].fillna(df2['score'].median() if not df2['score'].isna().all() else 600)
-    df2['valor'] = df2['valor'].fillna(df2['valor'].median() if not df2['valor'].isna().all() else 10000)
+def fill_missing(df2, medians):
+    """
+    Preenche nulos com as medianas informadas ({coluna: mediana ou NaN})
+    e aplica os tipos compactos de dtypes.PROCESSED_DTYPES.
+    """
+    for c, default in FILL_DEFAULTS.items():
+        m = medians.get(c, np.nan)
+        df2[c] = df2[c].fillna(default if pd.isna(m) else m)
     df2['meses_em_atraso'] = df2['meses_em_atraso'].fillna(0)
+    return dtypes.apply(df2, dtypes.PROCESSED_DTYPES)
+
+def read_raw(path):
+    """
+    Lê só as colunas mapeadas do CSV bruto, já com os tipos compactos (float32).
+    Se alguma coluna numérica tiver texto inválido, relê sem dtype (a conversão vira NaN em standardize).
+    Retorna (DataFrame, mapeamento).
+    """
+    header = list(pd.read_csv(path, nrows=0).columns)
+    mapped = detect_mapping(header)
+    usecols = sorted({c for c in mapped.values() if c is not None})
+    raw_dtypes = dtypes.read_dtypes(mapped)
+    try:
+        return pd.read_csv(path, usecols=usecols, dtype=raw_dtypes), mapped
+    except ValueError:
+        return pd.read_csv(path, usecols=usecols), mapped
 
-    df2.to_csv(OUT_PATH, index=False)
-    print(f"Dados processados salvos em: {OUT_PATH}")
+def process(df=None, save=True, target_map=None):
+    """
+    Limpa e padroniza os dados brutos.
+    df: DataFrame bruto já carregado (se None, lê RAW_PATH)
+    save: se True, grava o resultado em OUT_PATH
+    target_map: tabela de normalização do target (padrão: TARGET_VALUE_MAP)
+    Retorna o DataFrame processado (ou None se não houver dados).
+    """
+    if df is None:
+        if not os.path.exists(RAW_PATH):
+            print(f"Arquivo bruto não encontrado em {RAW_PATH}. Rode src/data_collection.py primeiro.")
+            return None
+        with span("ler_csv") as sp:
+            df, mapped = read_raw(RAW_PATH)
+            sp.add(bytes_read=os.path.getsize(RAW_PATH), rows_read=len(df))
+    else:
+        mapped = detect_mapping(list(df.columns))
+
+    with span("padronizar", rows_in=len(df)):
+        df2 = standardize(df, mapped, target_map=target_map)
+        del df
+
+    # preencher nulos razoavelmente
+    with span("imputar"):
+        df2 = fill_missing(df2, {c: df2[c].median() for c in FILL_DEFAULTS})
+
+    if save:
+        with span("gravar"):
+            save_table(df2, OUT_PATH)
+        print(f"Dados processados salvos em: {OUT_PATH}")
     print("Amostra:")
     print(df2.head())
-    return True
+    return df2
+
+def process_streaming(raw_path=RAW_PATH, out_path=OUT_PATH, chunksize=CHUNK_SIZE, target_map=None):
+    """
+    Modo streaming para arquivos maiores que a memória.
+    1a passada: lê só as colunas mapeadas em chunks e acumula um sketch de quantis por coluna.
+    2a passada: padroniza cada chunk, imputa com as medianas aproximadas e grava incrementalmente.
+    A memória fica limitada ao tamanho do chunk. Retorna o número de linhas gravadas (ou None).
+    """
+    if not os.path.exists(raw_path):
+        print(f"Arquivo bruto não encontrado em {raw_path}. Rode src/data_collection.py primeiro.")
+        return None
+
+    header = list(pd.read_csv(raw_path, nrows=0).columns)
+    mapped = detect_mapping(header)
+    usecols = sorted({c for c in mapped.values() if c is not None})
+
+    def chunks():
+        # sem dtype na leitura (um valor inválido no meio do arquivo não derruba a passada);
+        # a memória já é limitada pelo chunk e fill_missing compacta os tipos antes de gravar
+        return pd.read_csv(raw_path, usecols=usecols, chunksize=chunksize)
+
+    sketches = {c: QuantileSketch() for c in FILL_DEFAULTS}
+    unmapped = 0
+    with span("passada_medianas") as sp:
+        sp.add(bytes_read=os.path.getsize(raw_path))
+        for chunk in chunks():
+            part = standardize(chunk, mapped, verbose=False, target_map=target_map)
+            unmapped += part.attrs.get('target_unmapped', 0)
+            for c, sk in sketches.items():
+                sk.update(part[c].to_numpy())
+            sp.add(rows_read=len(chunk))
+    medians = {c: sk.median() for c, sk in sketches.items()}
+    print("Medianas aproximadas (sketch):", medians)
+    if unmapped:
+        print(f"Aviso: {unmapped} valores de target não puderam ser mapeados (preenchidos com 0)")
+
+    with span("passada_gravacao") as sp, TableWriter(out_path) as writer:
+        sp.add(bytes_read=os.path.getsize(raw_path))
+        for chunk in chunks():
+            # fill_missing aplica os tipos do schema: iguais em todos os chunks
+            part = fill_missing(standardize(chunk, mapped, verbose=False, target_map=target_map), medians)
+            writer.write(part)
+    print(f"Dados processados (streaming) salvos em: {out_path} ({writer.rows} linhas)")
+    return writer.rows
 
 if __name__ == "__main__":
     process()
@@ -0,0 +1,69 @@
+# src/dtypes.py
+"""
+Política de tipos compactos (schema) para os dados processados e as features:
+- valores monetários, razões e contínuas em float32 (precisão relativa ~1e-7, sobra para o modelo)
+- meses em atraso em float32 (a base pode trazer frações, ex.: 0.5, e overdue_flag depende de > 0)
+- flags e target em int8, buckets como category (já vêm assim do transformador)
+- aplicada desde a leitura do CSV bruto (read_csv com dtype) e mantida entre etapas:
+  Parquet preserva os tipos; leituras de CSV passam de novo por apply()
+Para voltar uma coluna a 64 bits, ajuste o schema aqui.
+"""
+import numpy as np
+import pandas as pd
+
+PROCESSED_DTYPES = {
+    'renda': 'float32',
+    'idade': 'float32',
+    'score': 'float32',
+    'valor': 'float32',
+    'meses_em_atraso': 'float32',
+    'target': 'int8',
+}
+
+FEATURE_DTYPES = {
+    **PROCESSED_DTYPES,
+    'loan_to_income': 'float32',
+    'estimated_monthly_payment': 'float32',
+    'pct_income_commitment': 'float32',
+    'overdue_flag': 'int8',
+    'serious_arrears': 'int8',
+    'txt_n': 'float32',
+    'txt_pct_negativo': 'float32',
+    'txt_media_entidades': 'float32',
+    'txt_ultimo_negativo': 'float32',
+}
+
+def read_dtypes(mapped, schema=PROCESSED_DTYPES):
+    """
+    dtype por coluna do CSV bruto ({coluna_original: dtype}) para o read_csv, a partir do mapeamento.
+    Colunas inteiras no schema são lidas como float32 (podem ter nulos até a imputação);
+    o target fica livre (pode vir como texto: yes/no, true/false...).
+    """
+    out = {}
+    for std, orig in mapped.items():
+        dtype = schema.get(std)
+        if orig is None or dtype is None or std == 'target':
+            continue
+        out[orig] = 'float32' if np.dtype(dtype).kind in 'iu' else dtype
+    return out
+
+def apply(df, schema=FEATURE_DTYPES):
+    """
+    Converte (no próprio DataFrame) as colunas presentes no schema.
+    Colunas inteiras no schema com nulos ou valores fracionários ficam em float32
+    (em vez de falhar ou truncar). Retorna o df.
+    """
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        s = df[col]
+        if np.dtype(dtype).kind in 'iu':
+            if not pd.api.types.is_numeric_dtype(s):
+                s = pd.to_numeric(s, errors='coerce')
+            if s.dtype.kind == 'f' and (s.isna().any() or (s != np.floor(s)).any()):
+                df[col] = s.astype('float32')
+                continue
+        elif not pd.api.types.is_numeric_dtype(s):
+            s = pd.to_numeric(s, errors='coerce')
+        df[col] = s.astype(dtype)
+    return df
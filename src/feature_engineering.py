@@ -1,67 +1,192 @@
 # src/feature_engineering.py
 """
 Criação de features para o modelo de inadimplência.
-Entrada: data/processed/loan_clean.csv
-Saída: data/features/loan_features.csv
+Entrada: data/processed/loan_clean.parquet
+Saída: data/features/loan_features.parquet (buckets preservados como category)
+Opcionalmente junta as features de texto por contrato (src/text_features.py).
+Tipos compactos (float32, flags/target int8) conforme src/dtypes.py.
+Modo particionado (make_features_partitioned): faixas de linhas calculadas em um pool de processos,
+saída em data/features/loan_features_parts/ (opcionalmente por chave: coluna=valor/part-*.parquet).
 """
 import pandas as pd
 import os
-import numpy as np
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-PROCESSED_PATH = 'data/processed/loan_clean.csv'
+import dtypes
+import tracing
+from storage import table_path, save_table, load_table, read_rows, row_ranges, table_columns, DEFAULT_FORMAT
+from feature_transformer import FeatureTransformer, AGE_BINS, AGE_LABELS, SCORE_BINS, SCORE_LABELS
+from data_processing import ID_COL
+from text_features import join_text_features
+from tracing import span
+
+PROCESSED_PATH = table_path('data/processed/loan_clean')
 FEATURE_DIR = 'data/features'
 os.makedirs(FEATURE_DIR, exist_ok=True)
-OUT_PATH = os.path.join(FEATURE_DIR, 'loan_features.csv')
+OUT_PATH = table_path(os.path.join(FEATURE_DIR, 'loan_features'))
+PARTS_DIR = os.path.join(FEATURE_DIR, 'loan_features_parts')
+PARTITION_ROWS = 250_000
+EXPECTED = ['renda','idade','score','valor','meses_em_atraso','target']
 
-def make_features():
-    if not os.path.exists(PROCESSED_PATH):
-        print(f"Arquivo processado não encontrado em {PROCESSED_PATH}. Rode src/data_processing.py primeiro.")
-        return False
+FEATURES = [
+    'renda','idade','score','valor','meses_em_atraso',
+    'loan_to_income','estimated_monthly_payment','pct_income_commitment',
+    'overdue_flag','serious_arrears','age_bucket','score_bucket','target'
+]
 
-    df = pd.read_csv(PROCESSED_PATH)
+def compute_features(df, renda_median=None, transformer=None):
+    """
+    Aplica as transformações de features (vetorizadas) sobre um DataFrame processado.
+    A lógica fica em feature_transformer.FeatureTransformer, a mesma usada na escoragem.
+    renda_median: mediana da renda usada no fallback de renda zero/nula; se None, usa a do próprio df.
+    transformer: FeatureTransformer já ajustado (ex.: o salvo com o modelo); tem precedência sobre renda_median.
+    Retorna um novo DataFrame com as colunas FEATURES.
+    """
+    if transformer is None:
+        transformer = FeatureTransformer(renda_median=renda_median)
+    df_final = transformer.transform(df)
+    df_final['target'] = df['target'] if 'target' in df.columns else 0
+    if list(df_final.columns) != FEATURES:
+        df_final = df_final[FEATURES]
+    return dtypes.apply(df_final)
 
-    # renomear colunas esperadas caso necessário (garantia)
-    expected = ['renda','idade','score','valor','meses_em_atraso','target']
-    for c in expected:
-        if c not in df.columns:
-            df[c] = 0
+def add_text_features(df_final, df, text_features, verbose=True):
+    """
+    Junta as features de texto (por contrato de df) a df_final, na mesma ordem de linhas.
+    """
+    df_final[ID_COL] = df[ID_COL].to_numpy()
+    return dtypes.apply(join_text_features(df_final, text_features, verbose=verbose).drop(columns=[ID_COL]))
 
-    # Feature 1: proporção do valor do empréstimo em relação à renda anual
-    # cuidado: renda pode ser mensal ou anual; assumimos renda mensal -> transformar para anual
-    renda_annual = df['renda'] * 12
-    df['loan_to_income'] = df['valor'] / (renda_annual.replace(0, np.nan))
-    df['loan_to_income'] = df['loan_to_income'].fillna(df['valor'] / (df['renda'].median()*12 + 1e-6))
+def make_features(df=None, save=True, text_features=None):
+    """
+    Cria as features a partir dos dados processados.
+    df: DataFrame processado (se None, lê PROCESSED_PATH)
+    save: se True, grava o resultado em OUT_PATH
+    text_features: agregações de texto por contrato (text_features.build_text_aggregates); se informado
+                   e o df tiver a coluna de contrato, acrescenta as colunas TEXT_FEATURES
+    Retorna o DataFrame de features (ou None se não houver dados).
+    """
+    if df is None:
+        if not os.path.exists(PROCESSED_PATH):
+            print(f"Arquivo processado não encontrado em {PROCESSED_PATH}. Rode src/data_processing.py primeiro.")
+            return None
+        with span("ler"):
+            df = dtypes.apply(load_table(PROCESSED_PATH, columns=[ID_COL] + EXPECTED), dtypes.PROCESSED_DTYPES)
 
-    # Feature 2: parcela estimada (hipótese simplificada: 5 anos)
-    df['estimated_monthly_payment'] = df['valor'] / (5*12)
+    with span("transformar", rows_in=len(df)):
+        df_final = compute_features(df)
+    if text_features is not None:
+        if ID_COL in df.columns:
+            with span("juntar_textos", rows_in=len(df_final), contratos_com_texto=len(text_features)):
+                df_final = add_text_features(df_final, df, text_features)
+        else:
+            print(f"Aviso: coluna {ID_COL} ausente nos dados processados; features de texto ignoradas.")
 
-    # Feature 3: porcentagem da renda comprometida
-    df['pct_income_commitment'] = df['estimated_monthly_payment'] / (df['renda'].replace(0, np.nan))
-    df['pct_income_commitment'] = df['pct_income_commitment'].fillna(df['estimated_monthly_payment'] / (df['renda'].median()+1e-6))
+    # salvar
+    if save:
+        with span("gravar"):
+            save_table(df_final, OUT_PATH)
+        print(f"Features salvas em: {OUT_PATH}")
+    print(df_final.head())
+    return df_final
 
-    # Feature 4: idade categórica
-    df['age_bucket'] = pd.cut(df['idade'], bins=[0,24,34,44,54,100], labels=['<=24','25-34','35-44','45-54','55+'])
+# estado de cada processo do pool (transmitido uma vez, no initializer)
+_worker = {}
 
-    # Feature 5: score bucket
-    df['score_bucket'] = pd.cut(df['score'], bins=[0,550,650,750,850,1000], labels=['baixo','medio-baixo','medio','alto','excelente'])
+def _init_worker(transformer, text_features):
+    # com fork o filho herda o tracer do pai (e o tracemalloc, com --trace-memory): desliga, os spans ficam no pai
+    tracing.finish_run()
+    _worker.update(transformer=transformer, text_features=text_features)
 
-    # Feature 6: flag atraso
-    df['overdue_flag'] = (df['meses_em_atraso'] > 0).astype(int)
-    df['serious_arrears'] = (df['meses_em_atraso'] >= 3).astype(int)
+def _partition_features(args):
+    """
+    Calcula as features de uma faixa de linhas [start, stop) e grava as partes no diretório.
+    Retorna o número de linhas gravadas.
+    """
+    index, in_path, start, stop, out_dir, partition_col = args
+    columns = [ID_COL] + EXPECTED + ([partition_col] if partition_col else [])
+    df = dtypes.apply(read_rows(in_path, start, stop, columns=columns), dtypes.PROCESSED_DTYPES)
+    df_final = compute_features(df, transformer=_worker['transformer'])
+    text_features = _worker['text_features']
+    if text_features is not None and ID_COL in df.columns:
+        df_final = add_text_features(df_final, df, text_features, verbose=False)
+    name = f'part-{index:05d}.{DEFAULT_FORMAT}'
+    if partition_col is None:
+        save_table(df_final, os.path.join(out_dir, name))
+    else:
+        keys = df[partition_col].to_numpy()
+        for value in pd.unique(keys):
+            key_dir = os.path.join(out_dir, f'{partition_col}={value}')
+            os.makedirs(key_dir, exist_ok=True)
+            save_table(df_final[keys == value], os.path.join(key_dir, name))
+    return len(df_final)
 
-    # Selecionar colunas finais para o modelo
-    features = [
-        'renda','idade','score','valor','meses_em_atraso',
-        'loan_to_income','estimated_monthly_payment','pct_income_commitment',
-        'overdue_flag','serious_arrears','age_bucket','score_bucket','target'
-    ]
-    df_final = df[features].copy()
+def global_renda_median(path):
+    """
+    Mediana exata da renda no arquivo inteiro, lendo só essa coluna (a mesma de make_features).
+    """
+    return FeatureTransformer().fit(load_table(path, columns=['renda'])).renda_median
 
-    # salvar
-    df_final.to_csv(OUT_PATH, index=False)
-    print(f"Features salvas em: {OUT_PATH}")
-    print(df_final.head())
-    return True
+def make_features_partitioned(in_path=PROCESSED_PATH, out_dir=PARTS_DIR, workers=None,
+                              partition_rows=PARTITION_ROWS, partition_col=None, text_features=None):
+    """
+    Cria as features em paralelo: o arquivo processado é dividido em faixas de ~`partition_rows` linhas
+    (em Parquet, nos limites dos row groups),
+    cada faixa é lida, transformada e gravada por um processo do pool (sem passar dados pelo pai).
+    A mediana da renda (fallback de renda zero/nula) é calculada uma vez no arquivo inteiro e
+    enviada aos processos junto com as agregações de texto: o resultado é o mesmo de make_features.
+    partition_col: se informado, a saída é particionada por essa coluna (out_dir/coluna=valor/part-*).
+    A saída é trocada de uma vez no final (out_dir.tmp -> out_dir); lida com storage.load_table(out_dir).
+    Retorna {'rows', 'partitions', 'seconds', 'rows_per_sec', 'path'} (ou None se não houver dados).
+    """
+    if not os.path.exists(in_path):
+        print(f"Arquivo processado não encontrado em {in_path}. Rode src/data_processing.py primeiro.")
+        return None
+    if partition_col is not None and partition_col not in table_columns(in_path):
+        raise ValueError(f"Coluna de partição {partition_col} não existe em {in_path}.")
+    t0 = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    ranges = row_ranges(in_path, partition_rows)
+    n = ranges[-1][1] if ranges else 0
+
+    with span("mediana_global"):
+        transformer = FeatureTransformer(renda_median=global_renda_median(in_path))
+
+    tmp_dir = out_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    tasks = [(i, in_path, start, stop, tmp_dir, partition_col) for i, (start, stop) in enumerate(ranges)]
+    with span("particoes", rows_in=n, partitions=len(tasks), workers=workers) as sp:
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                                     initargs=(transformer, text_features)) as ex:
+                rows = sum(ex.map(_partition_features, tasks))
+        else:
+            _worker.update(transformer=transformer, text_features=text_features)
+            rows = sum(map(_partition_features, tasks))
+        sp.set(rows_out=rows)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+
+    elapsed = time.perf_counter() - t0
+    report = {'rows': rows, 'partitions': len(tasks), 'seconds': round(elapsed, 3),
+              'rows_per_sec': round(rows / elapsed, 1) if elapsed else None, 'path': out_dir}
+    print(f"Features particionadas salvas em: {out_dir} — {rows} linhas, {len(tasks)} partições, "
+          f"{workers} processos, {report['seconds']}s ({report['rows_per_sec']} linhas/s)")
+    return report
 
 if __name__ == "__main__":
-    make_features()
+    import argparse
+    parser = argparse.ArgumentParser(description="Engenharia de features")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos em paralelo; > 1 grava a saída particionada em " + PARTS_DIR)
+    parser.add_argument("--partition-rows", type=int, default=PARTITION_ROWS)
+    parser.add_argument("--partition-col", default=None, help="coluna dos dados processados usada como chave")
+    args = parser.parse_args()
+    if args.workers > 1 or args.partition_col:
+        make_features_partitioned(workers=args.workers, partition_rows=args.partition_rows,
+                                  partition_col=args.partition_col)
+    else:
+        make_features()
@@ -0,0 +1,157 @@
+# src/feature_transformer.py
+"""
+Transformador de features único, usado no treino e em todos os caminhos de escoragem
+(lote, serviço online, dashboard, escorador compilado):
+- a lógica das features está escrita uma vez, sobre arrays NumPy (rápida para 1 linha ou milhões)
+- o estado (mediana da renda do treino, faixas e rótulos dos buckets) é salvo junto com o modelo
+- transform(df) devolve DataFrame (buckets como category); transform_arrays(colunas) não usa pandas
+- entradas float32 são calculadas em float32 (sem cópias em 64 bits); flags saem em int8
+"""
+import numpy as np
+
+BASE_COLS = ['renda','idade','score','valor','meses_em_atraso']
+DERIVED_COLS = ['loan_to_income','estimated_monthly_payment','pct_income_commitment','overdue_flag','serious_arrears']
+BUCKET_COLS = ['age_bucket','score_bucket']
+
+AGE_BINS = [0,24,34,44,54,100]
+AGE_LABELS = ['<=24','25-34','35-44','45-54','55+']
+SCORE_BINS = [0,550,650,750,850,1000]
+SCORE_LABELS = ['baixo','medio-baixo','medio','alto','excelente']
+
+LOAN_TERM_MONTHS = 5*12  # hipótese simplificada: 5 anos
+BLOCK = 1 << 16  # linhas por bloco nos buckets (temporários pequenos em bases grandes)
+
+def bucket_codes(x, bins):
+    """
+    Equivalente vetorizado de pd.cut(x, bins).codes (intervalos (a, b], -1 = fora/nulo).
+    """
+    x = np.asarray(x)
+    if x.dtype != np.float32:
+        x = x.astype(np.float64, copy=False)
+    bins = np.asarray(bins, dtype=np.float64)
+    out = np.empty(x.shape, dtype=np.int8 if len(bins) <= 128 else np.int64)
+    for start in range(0, x.size, BLOCK):
+        xb = x[start:start + BLOCK].astype(np.float64, copy=False)
+        codes = np.searchsorted(bins, xb, side='left') - 1
+        valid = (xb > bins[0]) & (xb <= bins[-1])
+        out[start:start + BLOCK] = np.where(valid, codes, -1)
+    return out
+
+class FeatureTransformer:
+    def __init__(self, renda_median=None, age_bins=AGE_BINS, age_labels=AGE_LABELS,
+                 score_bins=SCORE_BINS, score_labels=SCORE_LABELS):
+        self.renda_median = renda_median
+        self.age_bins = list(age_bins)
+        self.age_labels = list(age_labels)
+        self.score_bins = list(score_bins)
+        self.score_labels = list(score_labels)
+
+    def fit(self, data):
+        """
+        Guarda a mediana da renda (usada no fallback de renda zero/nula).
+        data: DataFrame ou dict de arrays com a coluna 'renda'.
+        """
+        self.renda_median = _nanmedian(data['renda'])
+        return self
+
+    def transform_arrays(self, columns, labels=True):
+        """
+        Calcula as features a partir de {coluna: array-like} sem pandas.
+        Colunas base ausentes são tratadas como 0. Retorna dict de arrays:
+        colunas base, derivadas, buckets (rótulos, None = fora das faixas; só se labels=True) e <bucket>_code.
+        """
+        n = len(next(iter(columns.values()))) if columns else 0
+        out = {}
+        for c in BASE_COLS:
+            out[c] = _as_float(columns[c]) if c in columns else np.zeros(n)
+        renda, valor, meses = out['renda'], out['valor'], out['meses_em_atraso']
+        renda_median = self.renda_median if self.renda_median is not None else _nanmedian(renda)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Feature 1: proporção do valor do empréstimo em relação à renda anual
+            # cuidado: renda pode ser mensal ou anual; assumimos renda mensal -> transformar para anual
+            # (operações in-place: só os arrays de saída e uma máscara ficam vivos)
+            renda_nz = np.where(renda == 0, np.nan, renda)
+            lti = renda_nz * 12
+            np.divide(valor, lti, out=lti)
+            miss = np.isnan(lti)
+            lti[miss] = valor[miss] / (renda_median*12 + 1e-6)
+            out['loan_to_income'] = lti
+
+            # Feature 2: parcela estimada
+            emp = valor / LOAN_TERM_MONTHS
+            out['estimated_monthly_payment'] = emp
+
+            # Feature 3: porcentagem da renda comprometida
+            pct = np.divide(emp, renda_nz, out=renda_nz)
+            np.isnan(pct, out=miss)
+            pct[miss] = emp[miss] / (renda_median + 1e-6)
+            out['pct_income_commitment'] = pct
+
+        # Feature 4/5: buckets de idade e score
+        for col, src, bins, names in (('age_bucket', 'idade', self.age_bins, self.age_labels),
+                                      ('score_bucket', 'score', self.score_bins, self.score_labels)):
+            codes = bucket_codes(out[src], bins)
+            out[f'{col}_code'] = codes
+            if labels:
+                out[col] = np.append(np.asarray(names, dtype=object), None)[codes]
+
+        # Feature 6: flag atraso
+        out['overdue_flag'] = (meses > 0).astype(np.int8)
+        out['serious_arrears'] = (meses >= 3).astype(np.int8)
+        return out
+
+    def transform(self, df):
+        """
+        Versão DataFrame: mantém as colunas base como vieram e adiciona as derivadas
+        e os buckets (category). Retorna um novo DataFrame.
+        """
+        import pandas as pd
+        cols = {c: df[c].to_numpy() for c in BASE_COLS if c in df.columns}
+        if not cols:
+            cols = {'renda': np.zeros(len(df))}
+        arrays = self.transform_arrays(cols, labels=False)
+        out = pd.DataFrame(index=df.index)
+        for c in BASE_COLS:
+            out[c] = df[c] if c in df.columns else 0
+        for c in DERIVED_COLS:
+            out[c] = arrays[c]
+        out['age_bucket'] = pd.Categorical.from_codes(arrays['age_bucket_code'], categories=self.age_labels, ordered=True)
+        out['score_bucket'] = pd.Categorical.from_codes(arrays['score_bucket_code'], categories=self.score_labels, ordered=True)
+        return out
+
+    def to_arrays(self, prefix='fe_'):
+        """
+        Estado em arrays NumPy (para salvar no artefato compilado .npz).
+        """
+        return {
+            f'{prefix}renda_median': np.float64(np.nan if self.renda_median is None else self.renda_median),
+            f'{prefix}age_bins': np.asarray(self.age_bins, dtype=np.float64),
+            f'{prefix}age_labels': np.asarray(self.age_labels, dtype=str),
+            f'{prefix}score_bins': np.asarray(self.score_bins, dtype=np.float64),
+            f'{prefix}score_labels': np.asarray(self.score_labels, dtype=str),
+        }
+
+    @classmethod
+    def from_arrays(cls, z, prefix='fe_'):
+        med = float(z[f'{prefix}renda_median'])
+        return cls(renda_median=None if np.isnan(med) else med,
+                   age_bins=z[f'{prefix}age_bins'].tolist(), age_labels=[str(v) for v in z[f'{prefix}age_labels']],
+                   score_bins=z[f'{prefix}score_bins'].tolist(), score_labels=[str(v) for v in z[f'{prefix}score_labels']])
+
+def _as_float(values):
+    """
+    float32 e inteiros pequenos (int8/int16, ex.: flags) viram float32 (dados processados compactos);
+    o resto vira float64.
+    """
+    values = np.asarray(values)
+    if values.dtype == np.float32 or (values.dtype.kind in 'iub' and values.dtype.itemsize <= 2):
+        return values.astype(np.float32, copy=False)
+    return values.astype(np.float64, copy=False)
+
+def _nanmedian(values):
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        values = values.astype(np.float64, copy=False)
+    values = values[~np.isnan(values)]
+    return float(np.median(values)) if values.size else float('nan')
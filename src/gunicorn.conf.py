@@ -0,0 +1,17 @@
+# src/gunicorn.conf.py
+"""
+Configuração do gunicorn para o serviço de escoragem (src/wsgi.py):
+  gunicorn --pythonpath src -c src/gunicorn.conf.py wsgi:app
+Workers gthread: cada processo escora em micro-lotes as requisições das suas threads.
+Sem preload_app: a thread do MicroBatcher não sobrevive ao fork, então cada worker cria o seu app
+(os arrays do modelo compilado são abertos em memory-map e compartilhados pelo page cache).
+"""
+import os
+
+bind = os.environ.get("SCORING_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("SCORING_WORKERS", os.cpu_count() or 1))  # um por núcleo
+worker_class = "gthread"
+threads = int(os.environ.get("SCORING_THREADS", 32))
+preload_app = False
+keepalive = 30
+accesslog = None
@@ -0,0 +1,150 @@
+# src/metrics.py
+"""
+Métricas de discriminação para modelos de risco, calculadas com uma única ordenação:
+- os scores são ordenados uma vez e agrupados por valor distinto (empates tratados como no sklearn)
+- KS, lift@k, AUC/Gini e tabela de ganhos saem das mesmas somas acumuladas (NumPy)
+- bootstrap vetorizado (pesos de Poisson sobre a ordenação já feita): intervalos de confiança
+  de todas as métricas sem reordenar a cada reamostragem, em blocos de memória limitada
+"""
+import numpy as np
+
+LIFT_KS = (0.05, 0.1, 0.2)
+
+def _sorted_groups(y_true, y_scores):
+    """
+    Ordena por score decrescente e devolve (y ordenado, início de cada grupo de score igual).
+    """
+    y = np.asarray(y_true).astype(np.float64).ravel()
+    s = np.asarray(y_scores, dtype=np.float64).ravel()
+    order = np.argsort(-s, kind="mergesort")
+    s_sorted = s[order]
+    starts = np.flatnonzero(np.r_[True, s_sorted[1:] != s_sorted[:-1]])
+    return y[order], starts
+
+def _metrics_matrix(pos, neg, lift_ks):
+    """
+    Métricas a partir de eventos/não eventos por grupo de score, em matrizes (réplicas, grupos).
+    Retorna dict {métrica: array (réplicas,)}.
+    """
+    cp = np.cumsum(pos, axis=1)
+    cn = np.cumsum(neg, axis=1)
+    P = cp[:, -1]
+    N = cn[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = cp / P[:, None]
+        fpr = cn / N[:, None]
+        ks = np.abs(tpr - fpr).max(axis=1)
+        # AUC exata (trapézios entre grupos; empates contam meio)
+        tpr0 = np.concatenate([np.zeros((tpr.shape[0], 1)), tpr], axis=1)
+        fpr0 = np.concatenate([np.zeros((fpr.shape[0], 1)), fpr], axis=1)
+        auc = (np.diff(fpr0, axis=1) * (tpr0[:, 1:] + tpr0[:, :-1]) / 2).sum(axis=1)
+    valid = (P > 0) & (N > 0)
+    out = {"auc": np.where(valid, auc, np.nan), "ks": np.where(valid, ks, np.nan)}
+    out["gini"] = 2 * out["auc"] - 1
+
+    total = P + N
+    cw = cp + cn
+    tot = pos + neg
+    rows = np.arange(cw.shape[0])
+    base_rate = np.where(total > 0, P / np.where(total > 0, total, 1), 0)
+    for k in lift_ks:
+        top = np.floor(k * total)
+        # eventos nas `top` primeiras linhas; dentro de um grupo empatado, proporcional
+        idx = np.minimum((cw < top[:, None]).sum(axis=1), cw.shape[1] - 1)
+        prev_w = np.where(idx > 0, cw[rows, idx - 1], 0)
+        prev_e = np.where(idx > 0, cp[rows, idx - 1], 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate_in_group = np.where(tot[rows, idx] > 0, pos[rows, idx] / tot[rows, idx], 0)
+            events_top = prev_e + (top - prev_w) * rate_in_group
+            lift = (events_top / top) / base_rate
+        out[f"lift{int(round(k * 100))}"] = np.where((top > 0) & (base_rate > 0), lift, np.nan)
+    return out
+
+def evaluate(y_true, y_scores, lift_ks=LIFT_KS):
+    """
+    KS, AUC, Gini e lift@k (k em fração da população) com uma única ordenação.
+    Sem observações, todas as métricas valem NaN.
+    """
+    y, starts = _sorted_groups(y_true, y_scores)
+    if y.size == 0:
+        return {k: float("nan") for k in ["auc", "ks", "gini"] + [f"lift{int(round(k * 100))}" for k in lift_ks]}
+    pos = np.add.reduceat(y, starts)[None, :]
+    neg = np.add.reduceat(1 - y, starts)[None, :]
+    return {k: float(v[0]) for k, v in _metrics_matrix(pos, neg, lift_ks).items()}
+
+def ks_statistic(y_true, y_scores):
+    return evaluate(y_true, y_scores, lift_ks=())["ks"]
+
+def lift_at_k(y_true, y_scores, k=0.1):
+    return evaluate(y_true, y_scores, lift_ks=(k,))[f"lift{int(round(k * 100))}"]
+
+def gains_table(y_true, y_scores, n_bins=10):
+    """
+    Tabela de ganhos por faixa da população (decis por padrão), ordenada do maior score ao menor.
+    Retorna dict de arrays: faixa, população acumulada, eventos (na faixa e acumulados),
+    taxa de eventos, captura acumulada, lift, lift acumulado e KS no ponto de corte.
+    """
+    y, starts = _sorted_groups(y_true, y_scores)
+    pos = np.add.reduceat(y, starts)
+    neg = np.add.reduceat(1 - y, starts)
+    cw = np.r_[0, np.cumsum(pos + neg)]
+    cp = np.r_[0, np.cumsum(pos)]
+    cn = np.r_[0, np.cumsum(neg)]
+    n, P, N = cw[-1], cp[-1], cn[-1]
+    cuts = np.linspace(0, n, n_bins + 1)
+    cum_events = np.interp(cuts, cw, cp)[1:]
+    cum_nonevents = np.interp(cuts, cw, cn)[1:]
+    events = np.diff(np.r_[0, cum_events])
+    pop = np.diff(cuts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base_rate = P / n
+        return {
+            "bin": np.arange(1, n_bins + 1),
+            "cum_pop_pct": cuts[1:] / n,
+            "events": events,
+            "cum_events": cum_events,
+            "event_rate": events / pop,
+            "cum_capture": cum_events / P,
+            "lift": (events / pop) / base_rate,
+            "cum_lift": (cum_events / cuts[1:]) / base_rate,
+            "ks": np.abs(cum_events / P - cum_nonevents / N),
+        }
+
+def bootstrap_metrics(y_true, y_scores, n_boot=200, alpha=0.05, lift_ks=LIFT_KS, seed=42, max_cells=20_000_000):
+    """
+    Intervalos de confiança (percentil) para todas as métricas de evaluate().
+    Usa bootstrap de Poisson: cada réplica dá um peso ~Poisson(1) a cada linha sobre a
+    ordenação já feita, então nenhuma réplica reordena os dados. As réplicas são processadas
+    em blocos de até max_cells pesos por vez (memória limitada em bases grandes).
+    Retorna {métrica: {'estimate', 'lower', 'upper', 'std'}}.
+    """
+    y, starts = _sorted_groups(y_true, y_scores)
+    n = y.size
+    if n == 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    block = max(1, min(n_boot, int(max_cells // n)))
+    reps = {}
+    done = 0
+    while done < n_boot:
+        b = min(block, n_boot - done)
+        w = rng.poisson(1.0, size=(b, n)).astype(np.float64)
+        pos = np.add.reduceat(w * y, starts, axis=1)
+        neg = np.add.reduceat(w, starts, axis=1) - pos
+        for k, v in _metrics_matrix(pos, neg, lift_ks).items():
+            reps.setdefault(k, []).append(v)
+        done += b
+
+    pos0 = np.add.reduceat(y, starts)[None, :]
+    point = {k: float(v[0]) for k, v in _metrics_matrix(pos0, np.add.reduceat(1 - y, starts)[None, :], lift_ks).items()}
+    out = {}
+    for k, chunks in reps.items():
+        v = np.concatenate(chunks)
+        v = v[~np.isnan(v)]
+        out[k] = {
+            "estimate": point.get(k, np.nan),
+            "lower": float(np.quantile(v, alpha / 2)) if v.size else np.nan,
+            "upper": float(np.quantile(v, 1 - alpha / 2)) if v.size else np.nan,
+            "std": float(v.std(ddof=1)) if v.size > 1 else np.nan,
+        }
+    return out
@@ -9,41 +9,92 @@ from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import roc_auc_score, precision_recall_fscore_support
+from sklearn.metrics import precision_recall_fscore_support
 import json
+import hashlib
 
-FEATURE_PATH = "data/features/loan_features.csv"
+import dtypes
+from storage import table_path, load_table
+import registry
+from feature_transformer import FeatureTransformer
+from text_features import TEXT_FEATURES
+from tracing import span
+from metrics import evaluate, bootstrap_metrics, gains_table, ks_statistic, lift_at_k  # noqa: F401 (ks/lift reexportados)
+
+FEATURE_PATH = table_path("data/features/loan_features")
 MODEL_DIR = "models"
 os.makedirs(MODEL_DIR, exist_ok=True)
 MODEL_PATH = os.path.join(MODEL_DIR, "model_pipeline_noleak.pkl")
 METRICS_PATH = os.path.join(MODEL_DIR, "metrics_summary_noleak.csv")
-
-def ks_statistic(y_true, y_scores):
-    df = pd.DataFrame({"y": y_true, "s": y_scores})
-    df = df.sort_values("s", ascending=False).reset_index(drop=True)
-    df["cum_event"] = (df["y"] == 1).cumsum()
-    df["cum_nonevent"] = (df["y"] == 0).cumsum()
-    total_event = df["y"].sum()
-    total_nonevent = (df["y"] == 0).sum()
-    if total_event == 0 or total_nonevent == 0:
-        return np.nan
-    df["cum_event_pct"] = df["cum_event"] / total_event
-    df["cum_nonevent_pct"] = df["cum_nonevent"] / total_nonevent
-    return float((df["cum_event_pct"] - df["cum_nonevent_pct"]).abs().max())
-
-def lift_at_k(y_true, y_scores, k=0.1):
-    df = pd.DataFrame({"y": y_true, "s": y_scores})
-    df = df.sort_values("s", ascending=False).reset_index(drop=True)
-    top_n = int(len(df) * k)
-    if top_n == 0 or df["y"].mean() == 0:
-        return np.nan
-    top = df.iloc[:top_n]
-    return float(top["y"].mean() / df["y"].mean())
-
-def train():
-    df = pd.read_csv(FEATURE_PATH)
+GAINS_PATH = os.path.join(MODEL_DIR, "gains_table_noleak.csv")
+LEADERBOARD_PATH = os.path.join(MODEL_DIR, "leaderboard_noleak.csv")
+COMPILED_PATH = os.path.join(MODEL_DIR, "model_noleak_compiled.npz")
+
+LEAK_COLS = ["meses_em_atraso","overdue_flag","serious_arrears"]
+NUMERIC_FEATURES = ["renda","idade","score","valor","loan_to_income","estimated_monthly_payment","pct_income_commitment"]
+# features de texto (src/text_features.py) entram só quando presentes na base de features
+NUMERIC_FEATURES += TEXT_FEATURES
+CATEGORICAL_FEATURES = ["age_bucket","score_bucket"]
+TARGET_COLS = ["target","inadimplente"]
+
+def compiled_arrays(clf):
+    """
+    Compila o pipeline treinado (imputação mediana + StandardScaler + OneHotEncoder + LogisticRegression)
+    em arrays: medianas, médias/escalas, categorias e coeficientes.
+    Inclui o estado do FeatureTransformer (clf.feature_transformer_), se houver.
+    Lido por src/compiled_scorer.py, que escora só com NumPy (sem sklearn/pandas).
+    """
+    pre = clf.named_steps["pre"]
+    lr = clf.named_steps["clf"]
+    arrays = {"coef": lr.coef_.ravel().astype(np.float64), "intercept": np.float64(lr.intercept_[0])}
+    transformer = getattr(clf, "feature_transformer_", None)
+    if transformer is not None:
+        arrays.update(transformer.to_arrays())
+    num_features, cat_features = [], []
+    for name, trans, cols in pre.transformers_:
+        if isinstance(trans, str) or len(cols) == 0:  # 'drop'/'passthrough' ou sem colunas
+            continue
+        if name == "num":
+            num_features = list(cols)
+            arrays["num_medians"] = trans.named_steps["imputer"].statistics_.astype(np.float64)
+            arrays["num_means"] = trans.named_steps["scaler"].mean_.astype(np.float64)
+            arrays["num_scales"] = trans.named_steps["scaler"].scale_.astype(np.float64)
+        elif name == "cat":
+            cat_features = list(cols)
+            arrays["cat_fill"] = np.asarray(trans.named_steps["imputer"].statistics_, dtype=str)
+            for i, cats in enumerate(trans.named_steps["onehot"].categories_):
+                arrays[f"cat_{i}"] = np.asarray(cats, dtype=str)
+    arrays["num_features"] = np.asarray(num_features, dtype=str)
+    arrays["cat_features"] = np.asarray(cat_features, dtype=str)
+    return arrays
+
+def export_compiled(clf, path=COMPILED_PATH):
+    """
+    Grava o .npz compilado e devolve os arrays (reaproveitados pelo registro de modelos).
+    """
+    arrays = compiled_arrays(clf)
+    np.savez(path, **arrays)
+    return arrays
+
+def build_preprocessor(numeric_features, categorical_features):
+    numeric_transformer = Pipeline(steps=[("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())])
+    categorical_transformer = Pipeline(steps=[("imputer", SimpleImputer(strategy="constant", fill_value="missing")), ("onehot", OneHotEncoder(handle_unknown="ignore"))])
+    return ColumnTransformer(transformers=[("num", numeric_transformer, numeric_features), ("cat", categorical_transformer, categorical_features)])
+
+def train(df=None, n_boot=0, search=False, n_jobs=-1):
+    """
+    Treina o pipeline sem as colunas com leak.
+    df: DataFrame de features (se None, lê FEATURE_PATH)
+    n_boot: se > 0, calcula intervalos de confiança (bootstrap) das métricas no teste
+    search: se True, escolhe o classificador por busca (CV estratificada + successive halving,
+            src/model_search.py) no conjunto de treino e grava o leaderboard em LEADERBOARD_PATH
+    """
+    if df is None:
+        # projeção: lê só as colunas usadas no treino (as colunas com leak nem são carregadas)
+        # (dtypes.apply: o fallback em CSV não guarda os tipos compactos)
+        df = dtypes.apply(load_table(FEATURE_PATH, columns=NUMERIC_FEATURES + CATEGORICAL_FEATURES + TARGET_COLS))
     # removendo features com leak se existir
-    leak_cols = [c for c in ["meses_em_atraso","overdue_flag","serious_arrears"] if c in df.columns]
+    leak_cols = [c for c in LEAK_COLS if c in df.columns]
     df_noleak = df.drop(columns=leak_cols, errors="ignore")
 
     y = df_noleak["target"] if "target" in df_noleak.columns else (df_noleak["inadimplente"] if "inadimplente" in df_noleak.columns else None)
@@ -51,44 +102,90 @@ def train():
         raise ValueError("Coluna target não encontrada em features.")
 
     # definir X num/cat
-    numeric_features = [c for c in ["renda","idade","score","valor","loan_to_income","estimated_monthly_payment","pct_income_commitment"] if c in df_noleak.columns]
-    categorical_features = [c for c in ["age_bucket","score_bucket"] if c in df_noleak.columns]
+    numeric_features = [c for c in NUMERIC_FEATURES if c in df_noleak.columns]
+    categorical_features = [c for c in CATEGORICAL_FEATURES if c in df_noleak.columns]
 
     X = df_noleak[numeric_features + categorical_features].copy()
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
 
-    numeric_transformer = Pipeline(steps=[("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())])
-    categorical_transformer = Pipeline(steps=[("imputer", SimpleImputer(strategy="constant", fill_value="missing")), ("onehot", OneHotEncoder(handle_unknown="ignore"))])
+    preprocessor = build_preprocessor(numeric_features, categorical_features)
 
-    preprocessor = ColumnTransformer(transformers=[("num", numeric_transformer, numeric_features), ("cat", categorical_transformer, categorical_features)])
+    estimator = LogisticRegression(max_iter=1000, class_weight="balanced")
+    if search:
+        from model_search import search as run_search
+        with span("busca", rows_in=len(X_train)):
+            leaderboard, estimator = run_search(X_train, y_train, preprocessor, n_jobs=n_jobs)
+        if not isinstance(estimator, LogisticRegression):
+            preprocessor.set_params(sparse_threshold=0)  # árvores precisam de matriz densa
+        leaderboard.to_csv(LEADERBOARD_PATH, index=False)
+        print("Leaderboard salvo:", LEADERBOARD_PATH)
+        print(leaderboard.head(10))
 
-    clf = Pipeline(steps=[("pre", preprocessor), ("clf", LogisticRegression(max_iter=1000, class_weight="balanced"))])
+    clf = Pipeline(steps=[("pre", preprocessor), ("clf", estimator)])
 
-    clf.fit(X_train, y_train)
+    with span("ajuste", rows_in=len(X_train), features=len(numeric_features) + len(categorical_features)):
+        clf.fit(X_train, y_train)
+        # transformador de features salvo junto com o modelo (mesma lógica/estado no treino e na escoragem)
+        clf.feature_transformer_ = FeatureTransformer().fit(df) if "renda" in df.columns else FeatureTransformer()
 
-    y_proba = clf.predict_proba(X_test)[:,1] if len(set(y_test))>1 else np.zeros(len(y_test))
-    y_pred = clf.predict(X_test) if len(set(y_test))>1 else np.zeros(len(y_test)).astype(int)
+    with span("avaliacao", rows_in=len(X_test)):
+        y_proba = clf.predict_proba(X_test)[:,1] if len(set(y_test))>1 else np.zeros(len(y_test))
+        y_pred = clf.predict(X_test) if len(set(y_test))>1 else np.zeros(len(y_test)).astype(int)
 
-    auc = roc_auc_score(y_test, y_proba) if len(set(y_test))>1 else np.nan
-    gini = 2*auc - 1 if not np.isnan(auc) else np.nan
-    ks = ks_statistic(y_test, y_proba)
-    lift10 = lift_at_k(y_test, y_proba, k=0.1)
-    precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average="binary", zero_division=0)
+        # AUC/Gini/KS/lift com uma única ordenação dos scores (src/metrics.py)
+        disc = evaluate(y_test, y_proba)
+        precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average="binary", zero_division=0)
 
     metrics = {
-        "auc": auc, "gini": gini, "ks": ks, "lift10": lift10,
+        "auc": disc["auc"], "gini": disc["gini"], "ks": disc["ks"], "lift10": disc["lift10"],
+        "lift5": disc["lift5"], "lift20": disc["lift20"],
         "precision": precision, "recall": recall, "f1": f1,
         "n_train": len(X_train), "n_test": len(X_test)
     }
+    if n_boot:
+        with span("bootstrap", n_boot=n_boot):
+            for name, ci in bootstrap_metrics(y_test, y_proba, n_boot=n_boot).items():
+                metrics[f"{name}_ci_lower"] = ci["lower"]
+                metrics[f"{name}_ci_upper"] = ci["upper"]
+
+    with span("salvar"):
+        data_hash = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+        save_model(clf, metrics, y_test, y_proba, data_hash=data_hash)
+    return metrics
 
-    # salvar
+def save_model(clf, metrics, y_test, y_proba, data_hash=None):
+    """
+    Grava o pipeline, a versão compilada (se logística), as métricas e a tabela de ganhos,
+    e registra uma nova versão ativa no registro de modelos (src/registry.py).
+    """
     joblib.dump(clf, MODEL_PATH)
+    compiled = None
+    if isinstance(clf.named_steps["clf"], LogisticRegression):
+        compiled = export_compiled(clf)
+        print("Modelo treinado e salvo:", MODEL_PATH, "| versão compilada:", COMPILED_PATH)
+    else:
+        # a versão compilada só existe para regressão logística; remove a antiga para não ficar defasada
+        if os.path.exists(COMPILED_PATH):
+            os.remove(COMPILED_PATH)
+        print("Modelo treinado e salvo:", MODEL_PATH)
+    registry.register(clf, metrics, data_hash=data_hash, compiled=compiled)
     pd.Series(metrics).to_csv(METRICS_PATH)
-    print("Modelo treinado e salvo:", MODEL_PATH)
+    pd.DataFrame(gains_table(y_test, y_proba)).to_csv(GAINS_PATH, index=False)
     print("Métricas salvas:", METRICS_PATH)
     print(metrics)
-    return metrics
 
 if __name__ == "__main__":
-    train()
+    import argparse
+    parser = argparse.ArgumentParser(description="Treino do modelo de inadimplência (sem leak)")
+    parser.add_argument("--search", action="store_true", help="busca de hiperparâmetros/famílias de modelo")
+    parser.add_argument("--n-boot", type=int, default=0, help="réplicas de bootstrap para ICs das métricas")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--incremental", action="store_true",
+                        help="treino out-of-core em chunks (SGD), para arquivos maiores que a memória")
+    args = parser.parse_args()
+    if args.incremental:
+        from model_incremental import train_incremental
+        train_incremental()
+    else:
+        train(n_boot=args.n_boot, search=args.search, n_jobs=args.n_jobs)
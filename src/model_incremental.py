@@ -0,0 +1,184 @@
+# src/model_incremental.py
+"""
+Treino out-of-core (arquivos de features maiores que a memória):
+- 1a passada em streaming: medianas (sketch de quantis), médias/variâncias, categorias e
+  contagem de classes, só sobre as linhas de treino
+- épocas de SGD logístico (partial_fit) sobre os chunks de treino, já pré-processados
+- holdout determinístico por linha (hash da posição) usado só para as métricas
+- o resultado é o mesmo tipo de artefato do treino em memória (Pipeline com ColumnTransformer
+  + LogisticRegression), então serve para todos os caminhos de escoragem e para o .npz compilado
+"""
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import precision_recall_fscore_support
+from sklearn.pipeline import Pipeline
+
+from cache import file_hash
+from feature_transformer import FeatureTransformer
+from metrics import evaluate
+from model import (FEATURE_PATH, NUMERIC_FEATURES, CATEGORICAL_FEATURES, TARGET_COLS,
+                   build_preprocessor, save_model)
+from sketches import QuantileSketch
+from storage import iter_table, table_columns
+
+CHUNK_SIZE = 500_000
+HOLDOUT_FRAC = 0.2
+
+def _holdout_mask(start, n, frac=HOLDOUT_FRAC):
+    """
+    Holdout estável por posição da linha (hash multiplicativo), igual em todas as passadas.
+    """
+    idx = np.arange(start, start + n, dtype=np.uint64)
+    h = (idx * np.uint64(2654435761)) % np.uint64(2**32)
+    return h < np.uint64(frac * 2**32)
+
+def _split_chunks(path, columns, chunksize):
+    """
+    Gera (X_chunk, y_chunk, holdout_mask) para cada chunk do arquivo.
+    """
+    target = next(c for c in TARGET_COLS if c in columns)
+    start = 0
+    for chunk in iter_table(path, columns=columns, chunksize=chunksize):
+        n = len(chunk)
+        yield chunk.drop(columns=[target]), chunk[target].to_numpy(), _holdout_mask(start, n)
+        start += n
+
+class _RunningMoments:
+    """
+    Contagem, média e soma de quadrados (Chan et al.) combináveis entre chunks.
+    """
+    def __init__(self, k):
+        self.n = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+
+    def update(self, X):
+        for j in range(X.shape[1]):
+            x = X[:, j]
+            x = x[~np.isnan(x)]
+            if not x.size:
+                continue
+            n_b, mean_b = x.size, x.mean()
+            m2_b = ((x - mean_b) ** 2).sum()
+            self._merge(j, n_b, mean_b, m2_b)
+
+    def _merge(self, j, n_b, mean_b, m2_b):
+        n_a, mean_a = self.n[j], self.mean[j]
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        self.mean[j] = mean_a + delta * n_b / n
+        self.m2[j] += m2_b + delta ** 2 * n_a * n_b / n
+        self.n[j] = n
+
+def _gather_stats(path, columns, numeric, categorical, chunksize):
+    sketches = {c: QuantileSketch() for c in numeric}
+    moments = _RunningMoments(len(numeric))
+    categories = {c: set() for c in categorical}
+    has_missing = {c: False for c in categorical}
+    n_rows = 0
+    class_counts = {}
+    for X, y, hold in _split_chunks(path, columns, chunksize):
+        X, y = X[~hold], y[~hold]
+        n_rows += len(X)
+        num = X[numeric].to_numpy(dtype=np.float64)
+        for j, c in enumerate(numeric):
+            sketches[c].update(num[:, j])
+        moments.update(num)
+        for c in categorical:
+            col = X[c]
+            has_missing[c] |= bool(col.isna().any())
+            categories[c].update(str(v) for v in col.dropna().unique())
+        for cls, cnt in zip(*np.unique(y, return_counts=True)):
+            class_counts[cls] = class_counts.get(cls, 0) + int(cnt)
+
+    medians = np.array([sketches[c].median() for c in numeric])
+    # média/variância após a imputação: os valores faltantes entram como a mediana
+    n_miss = n_rows - moments.n
+    for j in range(len(numeric)):
+        if n_miss[j] > 0:
+            moments._merge(j, n_miss[j], medians[j], 0.0)
+    var = moments.m2 / np.maximum(moments.n, 1)
+    cats = [sorted(categories[c] | ({"missing"} if has_missing[c] else set())) for c in categorical]
+    return {"medians": medians, "means": moments.mean, "vars": var, "n": n_rows, "categories": cats,
+            "class_counts": class_counts, "renda_median": sketches["renda"].median() if "renda" in sketches else None}
+
+def _fitted_preprocessor(stats, numeric, categorical, sample):
+    """
+    Monta o ColumnTransformer usual e injeta as estatísticas da passada em streaming.
+    O fit em uma amostra só define a estrutura; imputação, escala e categorias vêm de `stats`.
+    """
+    pre = build_preprocessor(numeric, categorical)
+    if categorical:
+        pre.transformers[1][1].named_steps["onehot"].set_params(categories=stats["categories"])
+    pre.fit(sample)
+    num = pre.named_transformers_["num"]
+    num.named_steps["imputer"].statistics_ = stats["medians"]
+    scaler = num.named_steps["scaler"]
+    scaler.mean_ = stats["means"]
+    scaler.var_ = stats["vars"]
+    scaler.scale_ = np.where(stats["vars"] > 0, np.sqrt(stats["vars"]), 1.0)
+    scaler.n_samples_seen_ = stats["n"]
+    return pre
+
+def train_incremental(path=FEATURE_PATH, chunksize=CHUNK_SIZE, epochs=3, alpha=1e-5, seed=42):
+    """
+    Treina a regressão logística por SGD em chunks, sem carregar o arquivo inteiro.
+    Retorna o dicionário de métricas (calculadas no holdout em streaming).
+    """
+    available = table_columns(path)
+    numeric = [c for c in NUMERIC_FEATURES if c in available]
+    categorical = [c for c in CATEGORICAL_FEATURES if c in available]
+    if not any(c in available for c in TARGET_COLS):
+        raise ValueError("Coluna target não encontrada em features.")
+    columns = numeric + categorical + [c for c in TARGET_COLS if c in available][:1]
+
+    stats = _gather_stats(path, columns, numeric, categorical, chunksize)
+    print(f"Estatísticas em streaming: {stats['n']} linhas de treino; classes {stats['class_counts']}")
+    sample = next(iter_table(path, columns=numeric + categorical, chunksize=1000))
+    pre = _fitted_preprocessor(stats, numeric, categorical, sample)
+
+    # class_weight="balanced" como no treino em memória (partial_fit não aceita; vai como sample_weight)
+    classes = np.array(sorted(stats["class_counts"]))
+    total = sum(stats["class_counts"].values())
+    class_weight = np.array([total / (len(classes) * stats["class_counts"][c]) for c in classes])
+
+    # average=True (ASGD): média dos pesos, converge bem em poucas épocas
+    sgd = SGDClassifier(loss="log_loss", alpha=alpha, average=True, random_state=seed)
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        for X, y, hold in _split_chunks(path, columns, chunksize):
+            X, y = X[~hold], y[~hold]
+            if not len(y):
+                continue
+            order = rng.permutation(len(y))
+            Xt = pre.transform(X.iloc[order])
+            sgd.partial_fit(Xt, y[order], classes=classes, sample_weight=class_weight[np.searchsorted(classes, y[order])])
+        print(f"Época {epoch + 1}/{epochs} concluída")
+
+    # artefato compatível com o treino em memória: LogisticRegression com os coeficientes do SGD
+    lr = LogisticRegression(max_iter=1000, class_weight="balanced")
+    lr.classes_ = sgd.classes_
+    lr.coef_ = sgd.coef_.copy()
+    lr.intercept_ = sgd.intercept_.copy()
+    lr.n_features_in_ = sgd.n_features_in_
+    lr.n_iter_ = np.array([sgd.n_iter_])
+    clf = Pipeline(steps=[("pre", pre), ("clf", lr)])
+    clf.feature_transformer_ = FeatureTransformer(renda_median=stats["renda_median"])
+
+    # métricas no holdout em streaming (só y e probabilidades ficam em memória)
+    ys, probas = [], []
+    for X, y, hold in _split_chunks(path, columns, chunksize):
+        if hold.any():
+            ys.append(y[hold])
+            probas.append(clf.predict_proba(X[hold])[:, 1])
+    y_test = np.concatenate(ys) if ys else np.array([])
+    y_proba = np.concatenate(probas) if probas else np.array([])
+    disc = evaluate(y_test, y_proba) if y_test.size else {}
+    metrics = {k: disc.get(k, np.nan) for k in ("auc", "gini", "ks", "lift10", "lift5", "lift20")}
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, (y_proba >= 0.5).astype(int),
+                                                               average="binary", zero_division=0)
+    metrics.update({"precision": precision, "recall": recall, "f1": f1})
+    metrics.update({"n_train": stats["n"], "n_test": int(y_test.size), "epochs": epochs})
+
+    save_model(clf, metrics, y_test, y_proba, data_hash=file_hash(path))
+    return metrics
@@ -0,0 +1,108 @@
+# src/model_search.py
+"""
+Busca de hiperparâmetros e famílias de modelo para o treino:
+- candidatos: LogisticRegression (C, solver) e HistGradientBoostingClassifier
+- validação cruzada estratificada (k folds) em paralelo (joblib, todos os núcleos)
+- o pré-processamento é ajustado uma vez por fold e reaproveitado por todos os candidatos;
+  cada fold é montado só quando uma rodada precisa dele, e a matriz fica esparsa para a
+  LogisticRegression (só os modelos que exigem matriz densa a convertem, dentro da tarefa)
+- successive halving: cada rodada avalia os candidatos em mais folds e descarta os piores
+- leaderboard com AUC/KS/lift e tempo de ajuste
+"""
+import math
+import time
+
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+
+from metrics import evaluate
+
+def default_candidates():
+    """
+    Lista de (nome, estimador não ajustado).
+    """
+    cands = []
+    for C in (0.01, 0.1, 1.0, 10.0):
+        for solver in ("lbfgs", "liblinear", "saga"):
+            cands.append((f"logreg_C{C}_{solver}",
+                          LogisticRegression(C=C, solver=solver, max_iter=1000, class_weight="balanced")))
+    for lr in (0.05, 0.1):
+        for leaves in (15, 31):
+            cands.append((f"hgb_lr{lr}_leaves{leaves}",
+                          HistGradientBoostingClassifier(learning_rate=lr, max_leaf_nodes=leaves, max_iter=300,
+                                                         early_stopping=True, class_weight="balanced",
+                                                         random_state=42)))
+    return cands
+
+SPARSE_OK = (LogisticRegression,)  # estimadores que aceitam a matriz esparsa do one-hot
+
+def _dense(X):
+    return X.toarray() if hasattr(X, "toarray") else X
+
+def _prepare_fold(preprocessor, X, y, tr, va):
+    """
+    Ajusta o pré-processamento no treino do fold e transforma treino e validação (esparsos, se o
+    ColumnTransformer devolver esparso).
+    """
+    pre = clone(preprocessor).fit(X.iloc[tr], y.iloc[tr])
+    return (pre.transform(X.iloc[tr]), y.iloc[tr].to_numpy(),
+            pre.transform(X.iloc[va]), y.iloc[va].to_numpy())
+
+def _fit_eval(name, estimator, fold_id, fold):
+    Xtr, ytr, Xva, yva = fold
+    if not isinstance(estimator, SPARSE_OK):
+        Xtr, Xva = _dense(Xtr), _dense(Xva)
+    t0 = time.perf_counter()
+    est = clone(estimator).fit(Xtr, ytr)
+    fit_time = time.perf_counter() - t0
+    m = evaluate(yva, est.predict_proba(Xva)[:, 1], lift_ks=(0.1,))
+    return {"candidate": name, "fold": fold_id, "auc": m["auc"], "ks": m["ks"], "lift10": m["lift10"],
+            "fit_time": fit_time}
+
+def search(X, y, preprocessor, candidates=None, n_splits=5, eta=3, n_jobs=-1, seed=42):
+    """
+    Successive halving sobre validação cruzada estratificada.
+    X, y: dados de treino; preprocessor: ColumnTransformer não ajustado.
+    Rodada r avalia os candidatos restantes em min(n_splits, eta**r) folds e mantém o melhor 1/eta (por AUC).
+    Retorna (leaderboard DataFrame ordenado, estimador vencedor não ajustado).
+    """
+    candidates = candidates or default_candidates()
+    by_name = dict(candidates)
+    splits = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    folds = {}  # montados sob demanda: as primeiras rodadas usam só 1..eta folds
+
+    results = []
+    done = set()
+    alive = [name for name, _ in candidates]
+    rung = 0
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while True:
+            n_folds = min(n_splits, eta ** rung)
+            tasks = [(name, f) for name in alive for f in range(n_folds) if (name, f) not in done]
+            for f in range(n_folds):
+                if f not in folds:
+                    folds[f] = _prepare_fold(preprocessor, X, y, *splits[f])
+            results += parallel(delayed(_fit_eval)(name, by_name[name], f, folds[f]) for name, f in tasks)
+            done.update(tasks)
+            board = pd.DataFrame(results)
+            scores = board[board["candidate"].isin(alive)].groupby("candidate")["auc"].mean()
+            print(f"Rodada {rung}: {len(alive)} candidatos em {n_folds} fold(s); melhor AUC {scores.max():.4f}")
+            if n_folds >= n_splits or len(alive) == 1:
+                break
+            keep = max(1, math.ceil(len(alive) / eta))
+            alive = list(scores.sort_values(ascending=False).index[:keep])
+            rung += 1
+
+    board = pd.DataFrame(results)
+    leaderboard = (board.groupby("candidate")
+                   .agg(auc=("auc", "mean"), auc_std=("auc", "std"), ks=("ks", "mean"), lift10=("lift10", "mean"),
+                        fit_time=("fit_time", "mean"), folds=("fold", "count"))
+                   .reset_index()
+                   .sort_values(["folds", "auc"], ascending=False)
+                   .reset_index(drop=True))
+    best = leaderboard.loc[0, "candidate"]
+    return leaderboard, clone(by_name[best])
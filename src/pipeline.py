@@ -0,0 +1,213 @@
+# src/pipeline.py
+"""
+Pipeline em processo único:
+- executa Coleta -> Processamento -> Features -> Treino no mesmo interpretador
+- passa os DataFrames entre as etapas em memória (sem reler CSV)
+- checkpoints em disco são opcionais (checkpoint=True)
+- cada etapa reporta tempo de execução e pico de memória; com report_path, a execução inteira
+  (etapas e passos internos, via src/tracing.py) vai para um relatório JSON
+- etapas de ETL com entradas, parâmetros e código inalterados são puladas (cache em data/cache)
+- se houver corpus de textos de clientes (e modelo PLN treinado), escora só os textos novos e junta
+  as agregações às features
+- workers > 1: features calculadas por partições do arquivo processado, em paralelo
+"""
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+import data_collection
+import data_processing
+import dtypes
+import feature_engineering
+import feature_transformer
+import pln
+import sketches
+import storage
+import text_features
+import tracing
+from cache import StageCache, file_hash, code_hash, stage_key
+from data_collection import copy_local_csv, save_macros
+from data_processing import process, process_streaming
+from feature_engineering import make_features, make_features_partitioned
+from model import train
+from storage import save_table, load_table
+from text_features import build_text_aggregates
+
+def _rows(obj):
+    return len(obj) if isinstance(obj, pd.DataFrame) else None
+
+def run_stage(name, func, *args, **kwargs):
+    """
+    Executa uma etapa dentro de um span (tempo de parede/CPU, pico de RSS, linhas e bytes).
+    peak_rss_mb: pico do RSS do processo durante a etapa; peak_mb: quanto ele subiu acima do RSS na entrada
+    (com trace_memory, alocações medidas pelo tracemalloc).
+    Retorna (resultado, relatório).
+    """
+    print(f"\n>>> INICIANDO: {name}")
+    with tracing.span(name) as sp:
+        rows_in = next((_rows(a) for a in args if _rows(a) is not None), None)
+        if rows_in is not None:
+            sp.set(rows_in=rows_in)
+        result = func(*args, **kwargs)
+        if _rows(result) is not None:
+            sp.set(rows_out=_rows(result))
+    report = {"stage": name, "seconds": round(sp.seconds, 3), "peak_rss_mb": sp.peak_rss_mb,
+              "peak_mb": sp.peak_mb, "cached": False}
+    print(f" SUCESSO: {name} concluído em {report['seconds']}s "
+          f"(pico de RSS: {report['peak_rss_mb']} MB, +{report['peak_mb']} MB na etapa)")
+    return result, report
+
+def skipped_stage(name, key):
+    print(f"\n>>> {name}: entradas inalteradas (chave {key[:12]}), etapa pulada — usando cache")
+    with tracing.span(name, cached=True):
+        pass
+    return {"stage": name, "seconds": 0.0, "peak_rss_mb": None, "peak_mb": 0.0, "cached": True}
+
+def processing_key(streaming):
+    params = {
+        "col_map": data_processing.COL_MAP_CANDIDATES,
+        "target_map": data_processing.TARGET_VALUE_MAP,
+        "fill_defaults": data_processing.FILL_DEFAULTS,
+        "streaming": streaming,
+        "pandas": pd.__version__,
+    }
+    return stage_key("processamento", file_hash(data_processing.RAW_PATH), params,
+                     code_hash(data_processing, dtypes, storage, sketches))
+
+def features_key(upstream_key, text_key=None):
+    params = {
+        "age_bins": feature_engineering.AGE_BINS, "age_labels": feature_engineering.AGE_LABELS,
+        "score_bins": feature_engineering.SCORE_BINS, "score_labels": feature_engineering.SCORE_LABELS,
+    }
+    return stage_key("features", upstream_key, text_key, params,
+                     code_hash(feature_engineering, feature_transformer, dtypes, text_features, storage))
+
+def collect(cache=None, force=False):
+    copy_local_csv()
+    # séries macro: no máximo uma coleta por dia
+    key = stage_key("macros", date.today().isoformat(), code_hash(data_collection))
+    if cache is not None and not force and cache.is_fresh("macros", key):
+        print("Indicadores macro já coletados hoje. Coleta pulada.")
+        return True
+    if save_macros() and cache is not None:
+        cache.record("macros", key)
+    return True
+
+def run_pipeline(checkpoint=False, streaming=False, use_cache=True, force=False, search=False,
+                 report_path=None, profile=False, workers=1, trace_memory=False):
+    """
+    Roda todas as etapas em sequência.
+    checkpoint: se True, grava os arquivos intermediários (data/processed, data/features)
+    streaming: se True, processa o CSV bruto em chunks (memória limitada) gravando em disco;
+               a etapa de features passa a ler o arquivo processado
+    use_cache: se True, pula processamento/features quando entradas, parâmetros e código não mudaram
+    force: se True, ignora o cache e reconstrói todas as etapas
+    search: se True, o treino faz busca de hiperparâmetros/famílias de modelo
+    report_path: se informado, grava o relatório JSON da execução (árvore de spans) nesse caminho
+    profile: se True, captura cProfile de cada etapa (reports/profiles/<execução>/<etapa>.prof)
+    trace_memory: se True, mede a memória dos spans com tracemalloc (exato, mas deixa tudo mais lento);
+                  por padrão o pico vem do RSS amostrado
+    workers: se > 1, a etapa de features roda particionada em um pool de processos
+             (lê o arquivo processado: vale com streaming, cache ou checkpoint)
+    Retorna a lista de relatórios por etapa.
+    """
+    tracer = tracing.start_run(memory=trace_memory, profile=profile)
+    status = "erro"
+    try:
+        reports = _run_stages(checkpoint, streaming, use_cache, force, search, workers)
+        status = "ok"
+    finally:
+        tracing.finish_run()
+        if report_path:
+            tracer.save(report_path, status=status, argv=sys.argv,
+                        options={"checkpoint": checkpoint, "streaming": streaming, "use_cache": use_cache,
+                                 "force": force, "search": search, "profile": profile,
+                                 "workers": workers, "trace_memory": trace_memory})
+    return reports
+
+def _run_stages(checkpoint, streaming, use_cache, force, search, workers=1):
+    reports = []
+    cache = StageCache() if use_cache else None
+
+    _, rep = run_stage("coleta", collect, cache, force)
+    reports.append(rep)
+
+    # textos: incremental por natureza (só escora o que chegou desde a última execução)
+    text_agg = None
+    if os.path.exists(text_features.TEXTS_PATH):
+        if pln.load_text_models() is None:
+            print(f"\nAVISO: corpus de textos em {text_features.TEXTS_PATH}, mas o modelo PLN não foi treinado "
+                  f"({pln.VECT_PATH}, {pln.CLF_PATH}). Seguindo sem features de texto.")
+        else:
+            text_agg, rep = run_stage("textos", build_text_aggregates, incremental=not force)
+            reports.append(rep)
+    text_key = file_hash(text_features.AGG_PATH) if text_agg is not None else None
+
+    proc_key = processing_key(streaming) if cache else None
+    feat_key = features_key(proc_key, text_key) if cache else None
+    feat_path = cache.artifact_path("features", storage.DEFAULT_FORMAT) if cache else None
+    proc_path = cache.artifact_path("processamento", storage.DEFAULT_FORMAT) if cache else None
+
+    if cache and not force and cache.is_fresh("features", feat_key):
+        # nada mudou até as features: pula processamento e features
+        reports.append(skipped_stage("processamento", proc_key))
+        reports.append(skipped_stage("features", feat_key))
+        df_feat = dtypes.apply(load_table(feat_path))
+    else:
+        # df_clean: dados processados em memória; proc_file: os mesmos dados em disco (se houver)
+        df_clean, proc_file = None, None
+        if cache and not force and cache.is_fresh("processamento", proc_key):
+            reports.append(skipped_stage("processamento", proc_key))
+            proc_file = proc_path
+        elif streaming:
+            proc_file = proc_path if cache else data_processing.OUT_PATH
+            rows, rep = run_stage("processamento", process_streaming, out_path=proc_file)
+            reports.append(rep)
+            if rows is None:
+                raise RuntimeError("Processamento não retornou dados. Parando o pipeline.")
+            if cache:
+                cache.record("processamento", proc_key, proc_path)
+        else:
+            df_clean, rep = run_stage("processamento", process, save=checkpoint)
+            reports.append(rep)
+            if df_clean is None:
+                raise RuntimeError("Processamento não retornou dados. Parando o pipeline.")
+            proc_file = data_processing.OUT_PATH if checkpoint else None
+            if cache:
+                save_table(df_clean, proc_path)
+                cache.record("processamento", proc_key, proc_path)
+                proc_file = proc_path
+
+        if workers > 1 and proc_file is not None:
+            # features em paralelo, por faixas do arquivo processado (saída particionada)
+            del df_clean
+            result, rep = run_stage("features", make_features_partitioned, proc_file, workers=workers,
+                                    text_features=text_agg)
+            reports.append(rep)
+            df_feat = dtypes.apply(load_table(result["path"])) if result else None
+        else:
+            if df_clean is None:
+                df_clean = dtypes.apply(load_table(proc_file), dtypes.PROCESSED_DTYPES)
+            df_feat, rep = run_stage("features", make_features, df_clean, save=checkpoint, text_features=text_agg)
+            reports.append(rep)
+            del df_clean
+        if df_feat is None:
+            raise RuntimeError("Engenharia de features não retornou dados. Parando o pipeline.")
+        if cache:
+            save_table(df_feat, feat_path)
+            cache.record("features", feat_key, feat_path)
+
+    _, rep = run_stage("treino", train, df_feat, search=search)
+    reports.append(rep)
+
+    print("\nResumo por etapa:               tempo   pico RSS   +etapa")
+    for r in reports:
+        status = "  (cache)" if r["cached"] else ""
+        rss = f"{r['peak_rss_mb']:>8.1f} MB" if r["peak_rss_mb"] is not None else f"{'-':>11}"
+        print(f"  {r['stage']:<14} {r['seconds']:>13.3f}s {rss} {r['peak_mb']:>6.1f} MB{status}")
+    return reports
+
+if __name__ == "__main__":
+    run_pipeline()
@@ -1,34 +1,109 @@
 # src/pln.py
 """
 Módulo PLN:
-- extract_entities(text): usa spaCy pt_core_news_sm para NER
+- extract_entities(text) / extract_entities_batch(texts): NER com spaCy pt_core_news_sm
+  (carregado só no primeiro uso, com os componentes que não servem ao NER desligados; lotes via nlp.pipe)
 - train_text_classifier(texts, labels): TF-IDF + LogisticRegression (salva vetor e modelo)
-- predict_text_class(text): retorna label, probabilidade e entidades
+- train_text_classifier_streaming(paths): treino em streaming para corpora que não cabem na memória
+  (HashingVectorizer sem vocabulário, IDF acumulado em uma passada, SGD logístico com partial_fit)
+- predict_texts(texts): classifica muitos textos de uma vez (um transform/predict_proba por bloco)
+- predict_text_class(text): retorna label, probabilidade e entidades de um texto
+Vetorizador e classificador são carregados uma vez e ficam em cache (recarregados se os arquivos mudarem).
 """
 import os
+import time
 import joblib
-from typing import List, Dict
+from typing import Dict, Iterable, List
+
+import numpy as np
+import scipy.sparse as sp
 
 # sklearn imports
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
 
-# spaCy
-try:
-    import spacy
-    nlp = spacy.load("pt_core_news_sm")
-except Exception:
-    nlp = None
-    # usuário será instruído a instalar o modelo
+from storage import iter_table
 
 VECT_PATH = "models/pln_vectorizer.pkl"
 CLF_PATH = "models/pln_clf.pkl"
+SPACY_MODEL = "pt_core_news_sm"
+BATCH_SIZE = 1000                # textos por lote no nlp.pipe
+CHUNK_SIZE = 50_000              # textos por bloco de vetorização/predição (limita a matriz esparsa)
+TEXT_COL = "texto"
+LABEL_COL = "label"
+N_FEATURES = 2 ** 20             # dimensão do hashing (memória fixa, independe do tamanho do corpus)
+
+_nlp = None
+_nlp_loaded = False
+_models = {}  # (vect_path, clf_path) -> (stamp dos arquivos, vec, clf)
+
+def get_nlp():
+    """
+    Carrega o spaCy uma única vez, no primeiro uso. Retorna None se spaCy/modelo não estiverem instalados
+    (usuário será instruído a instalar o modelo).
+    """
+    global _nlp, _nlp_loaded
+    if not _nlp_loaded:
+        _nlp_loaded = True
+        try:
+            import spacy
+            nlp = spacy.load(SPACY_MODEL)
+            nlp.select_pipes(enable=_ner_pipes(nlp))
+            _nlp = nlp
+        except Exception:
+            _nlp = None
+    return _nlp
+
+def _ner_pipes(nlp):
+    """
+    Componentes que o NER usa; o resto (parser, morphologizer, lemmatizer...) fica desligado.
+    O tok2vec compartilhado só fica ligado se o ner escuta ele (Tok2VecListener); se o ner tem
+    tok2vec próprio, rodar o compartilhado seria uma CNN sobre cada texto sem ninguém usar a saída.
+    """
+    if "ner" not in nlp.pipe_names:
+        return []
+    from spacy.pipeline.tok2vec import Tok2VecListener
+    listens = any(isinstance(node, Tok2VecListener) for node in nlp.get_pipe("ner").model.walk())
+    return ["tok2vec", "ner"] if listens and "tok2vec" in nlp.pipe_names else ["ner"]
+
+def _entities(doc) -> List[Dict]:
+    return [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
 
 def extract_entities(text: str) -> List[Dict]:
+    nlp = get_nlp()
     if nlp is None:
         return []
-    doc = nlp(text)
-    return [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
+    return _entities(nlp(text))
+
+def extract_entities_batch(texts: Iterable[str], batch_size: int = BATCH_SIZE, n_process: int = 1) -> List[List[Dict]]:
+    """
+    NER em lote com nlp.pipe; n_process > 1 distribui os lotes entre processos.
+    """
+    texts = list(texts)
+    nlp = get_nlp()
+    if nlp is None:
+        return [[] for _ in texts]
+    return [_entities(doc) for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process)]
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+def load_text_models(vect_path: str = VECT_PATH, clf_path: str = CLF_PATH):
+    """
+    Vetorizador e classificador em cache; só relê do disco se os arquivos mudarem.
+    Retorna (vec, clf) ou None se o modelo não foi treinado.
+    """
+    if not os.path.exists(vect_path) or not os.path.exists(clf_path):
+        return None
+    key = (vect_path, clf_path)
+    stamp = (_file_stamp(vect_path), _file_stamp(clf_path))
+    cached = _models.get(key)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, joblib.load(vect_path), joblib.load(clf_path))
+        _models[key] = cached
+    return cached[1], cached[2]
 
 def train_text_classifier(texts: List[str], labels: List[str]):
     """
@@ -44,19 +119,131 @@ def train_text_classifier(texts: List[str], labels: List[str]):
     os.makedirs("models", exist_ok=True)
     joblib.dump(vec, VECT_PATH)
     joblib.dump(clf, CLF_PATH)
+    _models[(VECT_PATH, CLF_PATH)] = ((_file_stamp(VECT_PATH), _file_stamp(CLF_PATH)), vec, clf)
     print("Modelo PLN treinado e salvo.")
     return vec, clf
 
+def _iter_corpus(paths, text_col, label_col, chunksize):
+    """
+    (textos, labels) em chunks, de um ou mais arquivos (CSV/Parquet/Feather).
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        for chunk in iter_table(path, columns=[text_col, label_col], chunksize=chunksize):
+            chunk = chunk.dropna(subset=[label_col])
+            yield chunk[text_col].fillna("").astype(str).tolist(), chunk[label_col].astype(str).to_numpy()
+
+def _hash_transform(hasher, texts, parallel=None, n_jobs=1):
+    """
+    Hashing em paralelo: o HashingVectorizer não tem estado, então cada parte do chunk
+    pode ser vetorizada em um processo e o resultado empilhado.
+    """
+    if parallel is None or n_jobs == 1 or len(texts) < 2 * n_jobs:
+        return hasher.transform(texts)
+    from joblib import delayed
+    parts = np.array_split(np.arange(len(texts)), n_jobs)
+    mats = parallel(delayed(hasher.transform)([texts[i] for i in part]) for part in parts)
+    return sp.vstack(mats).tocsr()
+
+def train_text_classifier_streaming(paths, text_col: str = TEXT_COL, label_col: str = LABEL_COL,
+                                    chunksize: int = CHUNK_SIZE, n_features: int = N_FEATURES,
+                                    ngram_range=(1, 2), epochs: int = 1, alpha: float = 1e-6,
+                                    n_jobs: int = 1, seed: int = 42):
+    """
+    Treina o classificador de textos lendo os arquivos em chunks (memória constante):
+    - 1a passada: frequência de documentos por coluna do hashing (IDF) e contagem das classes
+    - épocas seguintes: TF-IDF do chunk + SGDClassifier(log_loss, média ASGD).partial_fit,
+      com pesos de classe 'balanced' como no treino em memória
+    n_jobs > 1 vetoriza cada chunk em paralelo (joblib).
+    Salva o vetorizador (Pipeline hashing + TF-IDF) e o classificador nos mesmos caminhos do treino
+    em memória, então predict_texts/predict_text_class usam o modelo sem mudança.
+    """
+    from joblib import Parallel
+
+    hasher = HashingVectorizer(n_features=n_features, ngram_range=ngram_range, alternate_sign=False, norm=None)
+    doc_freq = np.zeros(n_features, dtype=np.int64)
+    n_docs = 0
+    class_counts = {}
+    t0 = time.perf_counter()
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for texts, labels in _iter_corpus(paths, text_col, label_col, chunksize):
+            X = _hash_transform(hasher, texts, parallel, n_jobs)
+            doc_freq += np.bincount(X.indices, minlength=n_features)  # cada termo aparece uma vez por linha no CSR
+            n_docs += X.shape[0]
+            for cls, cnt in zip(*np.unique(labels, return_counts=True)):
+                class_counts[cls] = class_counts.get(cls, 0) + int(cnt)
+        if not n_docs:
+            raise ValueError("Nenhum texto encontrado para treino.")
+        print(f"IDF: {n_docs} documentos em {time.perf_counter() - t0:.1f}s; classes {class_counts}")
+
+        tfidf = TfidfTransformer(sublinear_tf=False)
+        tfidf.idf_ = np.log((1 + n_docs) / (1 + doc_freq)) + 1  # mesma suavização do TfidfVectorizer
+        vec = Pipeline(steps=[("hash", hasher), ("tfidf", tfidf)])
+
+        classes = np.array(sorted(class_counts))
+        total = sum(class_counts.values())
+        class_weight = np.array([total / (len(classes) * class_counts[c]) for c in classes])
+        clf = SGDClassifier(loss="log_loss", alpha=alpha, average=True, random_state=seed)
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            t0 = time.perf_counter()
+            for texts, labels in _iter_corpus(paths, text_col, label_col, chunksize):
+                order = rng.permutation(len(texts))
+                X = tfidf.transform(_hash_transform(hasher, texts, parallel, n_jobs))[order]
+                y = labels[order]
+                clf.partial_fit(X, y, classes=classes, sample_weight=class_weight[np.searchsorted(classes, y)])
+            print(f"Época {epoch + 1}/{epochs}: {n_docs / (time.perf_counter() - t0):,.0f} textos/s")
+
+    os.makedirs("models", exist_ok=True)
+    joblib.dump(vec, VECT_PATH)
+    joblib.dump(clf, CLF_PATH)
+    _models[(VECT_PATH, CLF_PATH)] = ((_file_stamp(VECT_PATH), _file_stamp(CLF_PATH)), vec, clf)
+    print("Modelo PLN (streaming) treinado e salvo.")
+    return vec, clf
+
+def predict_texts(texts: Iterable[str], entities: bool = True, batch_size: int = BATCH_SIZE,
+                  n_process: int = 1, chunk_size: int = CHUNK_SIZE) -> List[Dict]:
+    """
+    Classifica vários textos: um transform + predict_proba por bloco de chunk_size textos,
+    NER via nlp.pipe (entities=False pula o spaCy).
+    Retorna lista de {label, proba, entities} na ordem de entrada.
+    """
+    models = load_text_models()
+    if models is None:
+        raise FileNotFoundError("Modelo PLN não treinado. Rode train_text_classifier() primeiro.")
+    vec, clf = models
+    texts = ["" if t is None else str(t) for t in texts]
+    results = []
+    for start in range(0, len(texts), chunk_size):
+        chunk = texts[start:start + chunk_size]
+        proba = clf.predict_proba(vec.transform(chunk))
+        best = proba.argmax(axis=1)
+        labels = clf.classes_[best].tolist()
+        probas = proba[np.arange(len(chunk)), best]
+        ents = extract_entities_batch(chunk, batch_size, n_process) if entities else [[] for _ in chunk]
+        results.extend({"label": label, "proba": float(p), "entities": e} for label, p, e in zip(labels, probas, ents))
+    return results
+
 def predict_text_class(text: str):
     """
     Retorna {label, proba, entities}
     """
-    if not os.path.exists(VECT_PATH) or not os.path.exists(CLF_PATH):
-        return {"error": "Modelo PLN não treinado. Rode train_text_classifier() primeiro."}
-    vec = joblib.load(VECT_PATH)
-    clf = joblib.load(CLF_PATH)
-    x = vec.transform([text])
-    label = clf.predict(x)[0]
-    proba = float(clf.predict_proba(x).max())
-    ents = extract_entities(text)
-    return {"label": label, "proba": proba, "entities": ents}
+    try:
+        return predict_texts([text])[0]
+    except FileNotFoundError as e:
+        return {"error": str(e)}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Treino do classificador de textos em streaming")
+    parser.add_argument("paths", nargs="+", help="arquivos CSV/Parquet com colunas de texto e label")
+    parser.add_argument("--text-col", default=TEXT_COL)
+    parser.add_argument("--label-col", default=LABEL_COL)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--n-features", type=int, default=N_FEATURES)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args()
+    train_text_classifier_streaming(args.paths, args.text_col, args.label_col, chunksize=args.chunksize,
+                                    n_features=args.n_features, epochs=args.epochs, n_jobs=args.n_jobs)
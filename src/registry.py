@@ -0,0 +1,183 @@
+# src/registry.py
+"""
+Registro local de modelos versionados (models/registry):
+- cada treino vira uma versão: versions/<versão>/ com
+    model.pkl      pipeline sklearn (joblib sem compressão: arrays abríveis com memory-map)
+    compiled/      arrays .npy do escorador NumPy (memory-map, compartilhados entre processos)
+    metadata.json  métricas, schema de features, hash dos dados, tipo do modelo
+- ACTIVE aponta a versão em uso (troca atômica); ActiveModel recarrega sozinho quando ele muda,
+  permitindo trocar de versão sem reiniciar os workers
+- retenção: register() mantém só as KEEP_VERSIONS versões mais recentes (e sempre a ativa);
+  prune() faz a limpeza sob demanda
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+REGISTRY_DIR = "models/registry"
+VERSIONS_DIR = os.path.join(REGISTRY_DIR, "versions")
+ACTIVE_PATH = os.path.join(REGISTRY_DIR, "ACTIVE")
+KEEP_VERSIONS = 5
+
+def version_dir(version):
+    return os.path.join(VERSIONS_DIR, version)
+
+def model_path(version):
+    return os.path.join(version_dir(version), "model.pkl")
+
+def compiled_dir(version):
+    return os.path.join(version_dir(version), "compiled")
+
+def _new_version():
+    base = datetime.now().strftime("v%Y%m%d-%H%M%S")
+    version, i = base, 1
+    while os.path.exists(version_dir(version)):
+        version = f"{base}-{i}"
+        i += 1
+    return version
+
+def register(clf, metrics, data_hash=None, compiled=None, activate=True, keep=KEEP_VERSIONS):
+    """
+    Grava uma nova versão do modelo e (por padrão) a ativa.
+    compiled: dict de arrays do escorador NumPy (model.compiled_arrays), se houver.
+    keep: versões mantidas no registro depois do registro (None = sem limite); ver prune().
+    Retorna o nome da versão.
+    """
+    import joblib
+
+    version = _new_version()
+    os.makedirs(version_dir(version), exist_ok=True)
+    joblib.dump(clf, model_path(version))
+    if compiled is not None:
+        from compiled_scorer import save_arrays
+        save_arrays(compiled, compiled_dir(version))
+
+    try:
+        features = [str(c) for c in clf[:-1].get_feature_names_out()]
+    except Exception:
+        features = []
+    metadata = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model_type": type(clf[-1]).__name__ if hasattr(clf, "__getitem__") else type(clf).__name__,
+        "input_features": [str(c) for c in getattr(clf, "feature_names_in_", [])],
+        "expected_features": features,
+        "data_hash": data_hash,
+        "metrics": {k: (float(v) if v == v else None) for k, v in metrics.items()},  # NaN -> null
+        "has_compiled": compiled is not None,
+    }
+    with open(os.path.join(version_dir(version), "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    if activate:
+        set_active(version)
+    print(f"Modelo registrado: {version}" + (" (ativo)" if activate else ""))
+    if keep is not None:
+        prune(keep)
+    return version
+
+def list_versions():
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(os.listdir(VERSIONS_DIR))
+
+def metadata(version):
+    with open(os.path.join(version_dir(version), "metadata.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def set_active(version):
+    if not os.path.isdir(version_dir(version)):
+        raise ValueError(f"Versão {version} não encontrada em {VERSIONS_DIR}")
+    tmp = ACTIVE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, ACTIVE_PATH)
+
+def active_version():
+    if not os.path.exists(ACTIVE_PATH):
+        return None
+    with open(ACTIVE_PATH, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+def prune(keep=KEEP_VERSIONS):
+    """
+    Apaga as versões mais antigas, mantendo as `keep` mais recentes; a versão ativa nunca é apagada.
+    Retorna a lista de versões removidas.
+    """
+    if keep < 1:
+        raise ValueError("keep precisa ser >= 1")
+    active = active_version()
+    versions = list_versions()  # nomes com data e hora: ordem alfabética = cronológica
+    removed = [v for v in versions[:-keep] if v != active]
+    for v in removed:
+        shutil.rmtree(version_dir(v))
+    if removed:
+        print(f"Registro: {len(removed)} versões antigas removidas (mantidas as {keep} mais recentes)")
+    return removed
+
+def load_pipeline(version=None, mmap=True):
+    """
+    Carrega o pipeline sklearn da versão (padrão: ativa); com mmap os arrays grandes ficam
+    mapeados do disco e são compartilhados entre processos.
+    """
+    import joblib
+    version = version or active_version()
+    if version is None:
+        raise FileNotFoundError("Nenhuma versão ativa no registro de modelos.")
+    return joblib.load(model_path(version), mmap_mode="r" if mmap else None)
+
+class ActiveModel:
+    """
+    Mantém o modelo da versão ativa e troca automaticamente quando ACTIVE muda.
+    kind: 'compiled' (escorador NumPy; versões sem artefato compilado caem no pipeline) ou 'pipeline' (sklearn).
+    get() custa um stat do arquivo ACTIVE por chamada.
+    """
+    def __init__(self, kind="compiled"):
+        self.kind = kind
+        self.version = None
+        self.model = None
+        self._stamp = None
+
+    def get(self):
+        try:
+            st = os.stat(ACTIVE_PATH)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if self.model is None or stamp != self._stamp:
+            version = active_version()
+            if version is None:
+                raise FileNotFoundError("Nenhuma versão ativa no registro de modelos.")
+            if version != self.version or self.model is None:
+                if self.kind == "compiled" and os.path.isdir(compiled_dir(version)):
+                    from compiled_scorer import CompiledScorer
+                    self.model = CompiledScorer(compiled_dir(version))
+                else:
+                    self.model = load_pipeline(version)
+                if self.version is not None:
+                    print(f"Modelo trocado: {self.version} -> {version}")
+                self.version = version
+            self._stamp = stamp
+        return self.model
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Registro de modelos")
+    sub = parser.add_subparsers(dest="cmd")
+    sub.add_parser("list", help="lista as versões")
+    act = sub.add_parser("activate", help="ativa uma versão")
+    act.add_argument("version")
+    pr = sub.add_parser("prune", help="remove as versões antigas (a ativa é sempre mantida)")
+    pr.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="versões mais recentes mantidas")
+    args = parser.parse_args()
+    if args.cmd == "activate":
+        set_active(args.version)
+        print(f"Versão ativa: {args.version}")
+    elif args.cmd == "prune":
+        prune(args.keep)
+    else:
+        current = active_version()
+        for v in list_versions():
+            m = metadata(v)
+            mark = "*" if v == current else " "
+            print(f"{mark} {v}  {m['model_type']:<32} auc={m['metrics'].get('auc')}  data={str(m['data_hash'])[:12]}")
@@ -0,0 +1,159 @@
+# src/scoring.py
+"""
+Escoragem em lote (batch) com models/model_pipeline_noleak.pkl:
+- carrega o pipeline uma única vez (por processo)
+- lê o arquivo de entrada (dados processados, CSV/Parquet) em chunks
+- aplica as mesmas features do treino (FeatureTransformer salvo com o modelo)
+- roda predict_proba vetorizado por chunk, opcionalmente em um pool de processos
+- grava os scores em Parquet ou CSV e reporta linhas/s
+
+Uso: python src/scoring.py entrada.parquet saida.parquet [--id-col contrato] [--workers 4]
+"""
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from feature_engineering import EXPECTED, FEATURES, compute_features
+from model import MODEL_PATH, NUMERIC_FEATURES, CATEGORICAL_FEATURES
+import registry
+from sketches import QuantileSketch
+from storage import iter_table, table_columns, TableWriter
+from tracing import span
+
+CHUNK_SIZE = 200_000
+SCORE_COL = "proba_inadimplencia"
+
+_model = None
+
+def load_model(path=None):
+    """
+    Carrega o pipeline uma vez por processo e reaproveita nas chamadas seguintes.
+    path None: versão ativa do registro de modelos (memory-map, compartilhada entre processos);
+    sem registro, MODEL_PATH.
+    """
+    global _model
+    if _model is None:
+        if path is None and registry.active_version() is not None:
+            _model = registry.load_pipeline()
+        else:
+            _model = joblib.load(path or MODEL_PATH)
+    return _model
+
+def _init_worker(model_path):
+    load_model(model_path)
+
+def score_frame(df, renda_median=None, id_col=None, model=None):
+    """
+    Escora um DataFrame processado; retorna DataFrame [id_col?, SCORE_COL].
+    Usa o FeatureTransformer salvo com o modelo; renda_median só é usada em modelos antigos, sem ele.
+    """
+    if model is None:
+        model = load_model()
+    feats = compute_features(df, renda_median=renda_median, transformer=getattr(model, "feature_transformer_", None))
+    cols = list(getattr(model, "feature_names_in_", NUMERIC_FEATURES + CATEGORICAL_FEATURES))
+    for c in cols:
+        if c not in feats.columns:
+            # features externas (ex.: de texto) vêm prontas no df; sem elas, 0
+            feats[c] = df[c].fillna(0).to_numpy() if c in df.columns else 0.0
+    X = feats[cols]
+    # features guardadas em float32 (src/dtypes.py): o modelo calcula em float64, como o escorador compilado
+    X = X.astype({c: np.float64 for c in cols if X[c].dtype.kind in "fiub" and X[c].dtype != np.float64})
+    proba = model.predict_proba(X)[:, 1]
+    out = pd.DataFrame({SCORE_COL: proba.astype(np.float64)}, index=df.index)
+    if id_col is not None:
+        out.insert(0, id_col, df[id_col].to_numpy())
+    return out
+
+def _score_chunk(args):
+    df, renda_median, id_col = args
+    return score_frame(df, renda_median=renda_median, id_col=id_col), len(df)
+
+def global_renda_median(path, chunksize=CHUNK_SIZE):
+    """
+    Mediana (aproximada) da renda no arquivo inteiro, lendo só essa coluna.
+    Usada no fallback de renda zero/nula para que o resultado não dependa do chunk.
+    """
+    sk = QuantileSketch()
+    for chunk in iter_table(path, columns=["renda"], chunksize=chunksize):
+        sk.update(chunk["renda"].to_numpy())
+    return sk.median()
+
+def score_file(in_path, out_path, id_col=None, chunksize=CHUNK_SIZE, workers=1, model_path=None,
+               renda_median=None):
+    """
+    Escora o arquivo inteiro em chunks e grava os scores de forma incremental.
+    workers > 1 distribui os chunks em um pool de processos (cada um carrega o modelo uma vez).
+    Levanta ValueError se o arquivo não tiver as colunas processadas usadas pelo modelo (ex.: CSV bruto).
+    Retorna {'rows', 'seconds', 'rows_per_sec'}.
+    """
+    t0 = time.perf_counter()
+    model = load_model(model_path)
+    if renda_median is None and getattr(model, "feature_transformer_", None) is None:
+        # modelo antigo, sem transformador salvo: mediana global do arquivo
+        renda_median = global_renda_median(in_path, chunksize)
+    available = set(table_columns(in_path))
+    # colunas processadas de que as features do modelo dependem (target e meses_em_atraso são opcionais)
+    required = [c for c in EXPECTED if c in getattr(model, "feature_names_in_", NUMERIC_FEATURES)]
+    absent = [c for c in required + ([id_col] if id_col else []) if c not in available]
+    if absent:
+        raise ValueError(f"{in_path} não tem as colunas {absent} dos dados processados "
+                         f"(esperado: {required}). Rode o processamento (src/data_processing.py) antes de escorar.")
+    # features que o modelo usa e compute_features não calcula (ex.: de texto) vêm prontas do arquivo
+    external = [c for c in getattr(model, "feature_names_in_", []) if c not in FEATURES]
+    missing = [c for c in external if c not in available]
+    if missing:
+        print(f"Aviso: {in_path} não tem as colunas {missing} usadas pelo modelo; escoradas como 0.")
+    columns = EXPECTED + [c for c in external if c in available] + ([id_col] if id_col else [])
+    chunks = ((chunk, renda_median, id_col) for chunk in iter_table(in_path, columns=columns, chunksize=chunksize))
+
+    rows = 0
+    with span("escoragem_lote", workers=workers) as sp, TableWriter(out_path) as writer:
+        if workers > 1:
+            # janela limitada de chunks em voo (Executor.map consumiria o arquivo inteiro de uma vez)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as ex:
+                pending = deque()
+                for args in chunks:
+                    pending.append(ex.submit(_score_chunk, args))
+                    if len(pending) >= 2 * workers:
+                        scored, n = pending.popleft().result()
+                        writer.write(scored)
+                        rows += n
+                while pending:
+                    scored, n = pending.popleft().result()
+                    writer.write(scored)
+                    rows += n
+        else:
+            for args in chunks:
+                scored, n = _score_chunk(args)
+                writer.write(scored)
+                rows += n
+        sp.set(rows_in=rows, rows_out=rows)
+
+    elapsed = time.perf_counter() - t0
+    report = {"rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1) if elapsed else None}
+    print(f"Scores salvos em: {out_path} — {rows} linhas em {report['seconds']}s ({report['rows_per_sec']} linhas/s)")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escoragem em lote do modelo de inadimplência")
+    parser.add_argument("input", help="arquivo processado (CSV/Parquet) com renda, idade, score, valor...")
+    parser.add_argument("output", help="arquivo de saída (.parquet ou .csv)")
+    parser.add_argument("--id-col", default=None, help="coluna de identificação a copiar para a saída")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="processos em paralelo (1 = sem pool)")
+    parser.add_argument("--model", default=None, help=f"padrão: versão ativa do registro (ou {MODEL_PATH})")
+    parser.add_argument("--report", default=None, help="grava o relatório JSON (spans) da escoragem")
+    args = parser.parse_args()
+    if args.report:
+        import tracing
+        tracing.start_run()
+    score_file(args.input, args.output, id_col=args.id_col, chunksize=args.chunksize,
+               workers=args.workers, model_path=args.model)
+    if args.report:
+        tracing.finish_run().save(args.report, argv=sys.argv)
@@ -0,0 +1,249 @@
+# src/serving.py
+"""
+Serviço HTTP de escoragem online:
+- pipeline carregado uma única vez e mantido em memória
+- POST /score aceita um candidato (objeto JSON) ou vários (lista, ou {"applicants": [...]})
+- requisições concorrentes são agrupadas em micro-lotes para um único predict_proba
+- campos numéricos inválidos são recusados na própria requisição (400), antes de entrar no lote;
+  se um lote ainda assim falhar, cada requisição é escorada sozinha e só a que falhou recebe o erro
+- com o artefato compilado (models/model_noleak_compiled.npz) escora só com NumPy, sem montar DataFrame;
+  sem ele, usa o pipeline sklearn — em ambos os casos com o FeatureTransformer salvo no treino
+- com uma versão ativa no registro (src/registry.py) usa ela e troca de versão sem reiniciar
+  quando models/registry/ACTIVE muda
+- GET /metrics expõe latência p50/p99, throughput, tamanho médio dos lotes e requisições com erro (4xx/5xx)
+
+Uso: python src/serving.py [--port 8000] [--threads 32] [--max-batch 256] [--max-wait-ms 0.5] [--no-registry]
+     (servidor waitress; --server dev usa o servidor de desenvolvimento do Flask)
+Produção com vários processos: gunicorn --pythonpath src -c src/gunicorn.conf.py wsgi:app (ver src/wsgi.py)
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify, request
+
+from compiled_scorer import CompiledScorer
+from feature_engineering import EXPECTED
+from model import MODEL_PATH, COMPILED_PATH
+import registry
+from scoring import SCORE_COL, load_model, score_frame
+from text_features import TEXT_FEATURES
+
+INPUT_COLS = [c for c in EXPECTED if c != "target"] + TEXT_FEATURES
+MAX_BATCH = 256
+# janela curta: sob carga os lotes se formam enquanto o anterior é escorado; 2 ms dobravam a p50
+MAX_WAIT_MS = 0.5
+
+class MicroBatcher:
+    """
+    Agrupa requisições concorrentes: a thread de escoragem espera até max_wait_ms
+    (ou até max_batch linhas) e escora tudo de uma vez.
+    """
+    def __init__(self, score_fn, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.batch_sizes = deque(maxlen=10_000)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        fut = Future()
+        self.queue.put((records, fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            items = [self.queue.get()]
+            n = len(items[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                items.append(item)
+                n += len(item[0])
+            self._run(items)
+
+    def _run(self, items):
+        records = [r for recs, _ in items for r in recs]
+        try:
+            scores = self.score_fn(records)
+        except Exception as e:
+            if len(items) == 1:
+                items[0][1].set_exception(e)
+                return
+            # um registro ruim não derruba as outras requisições do lote: escora uma a uma
+            for item in items:
+                self._run([item])
+            return
+        self.batch_sizes.append(len(records))
+        start = 0
+        for recs, fut in items:
+            fut.set_result(scores[start:start + len(recs)])
+            start += len(recs)
+
+class LatencyStats:
+    """
+    Latências das últimas N requisições e contadores para throughput.
+    """
+    def __init__(self, window=10_000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.client_errors = 0
+        self.server_errors = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, seconds, rows):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.requests += 1
+            self.rows += rows
+
+    def record_error(self, status):
+        with self._lock:
+            if status >= 500:
+                self.server_errors += 1
+            else:
+                self.client_errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            lat = np.array(self.latencies) * 1000.0
+            elapsed = time.perf_counter() - self.started
+            requests_, rows = self.requests, self.rows
+            client_errors, server_errors = self.client_errors, self.server_errors
+        return {
+            "requests": requests_,
+            "rows": rows,
+            "client_errors": client_errors,
+            "server_errors": server_errors,
+            "p50_ms": float(np.percentile(lat, 50)) if lat.size else None,
+            "p99_ms": float(np.percentile(lat, 99)) if lat.size else None,
+            "requests_per_sec": requests_ / elapsed if elapsed else None,
+            "rows_per_sec": rows / elapsed if elapsed else None,
+        }
+
+def parse_records(records):
+    """
+    Converte os campos de entrada de cada registro para float (ausente ou null = nulo).
+    Retorna (registros convertidos, None) ou (None, mensagem de erro) se algum valor não for numérico.
+    """
+    parsed = []
+    for i, r in enumerate(records):
+        row = {}
+        for c in INPUT_COLS:
+            v = r.get(c)
+            if v is None:
+                continue
+            try:
+                row[c] = float(v)
+            except (TypeError, ValueError):
+                return None, f"registro {i}: valor inválido para {c}: {v!r}"
+        parsed.append(row)
+    return parsed, None
+
+def _score_with(model, records):
+    if isinstance(model, CompiledScorer):
+        columns = {c: [r.get(c, np.nan) for r in records] for c in INPUT_COLS}
+        return model.score_raw(columns).tolist()
+    df = pd.DataFrame.from_records(records, columns=INPUT_COLS)
+    return score_frame(df, model=model)[SCORE_COL].tolist()
+
+def create_app(model_path=MODEL_PATH, compiled_path=COMPILED_PATH, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS,
+               use_registry=True):
+    active = None
+    if use_registry and registry.active_version() is not None:
+        active = registry.ActiveModel("compiled" if compiled_path else "pipeline")
+        active.get()
+        model_name = None
+
+        def score_records(records):
+            return _score_with(active.get(), records)
+    elif compiled_path and os.path.exists(compiled_path):
+        scorer = CompiledScorer(compiled_path)
+        model_name = compiled_path
+
+        def score_records(records):
+            return _score_with(scorer, records)
+    else:
+        model = load_model(model_path)
+        model_name = model_path
+
+        def score_records(records):
+            return _score_with(model, records)
+
+    batcher = MicroBatcher(score_records, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    stats = LatencyStats()
+    app = Flask(__name__)
+
+    @app.route("/score", methods=["POST"])
+    def score():
+        t0 = time.perf_counter()
+        payload = request.get_json(force=True, silent=True)
+        if isinstance(payload, dict) and "applicants" in payload:
+            payload = payload["applicants"]
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            stats.record_error(400)
+            return jsonify({"error": "envie um objeto JSON ou uma lista de objetos"}), 400
+        records, error = parse_records(records)
+        if error:
+            stats.record_error(400)
+            return jsonify({"error": error}), 400
+        try:
+            scores = batcher.submit(records).result()
+        except Exception as e:
+            stats.record_error(500)
+            return jsonify({"error": f"falha na escoragem: {e}"}), 500
+        stats.record(time.perf_counter() - t0, len(records))
+        return jsonify({SCORE_COL: scores[0]} if single else {SCORE_COL: scores})
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        snap = stats.snapshot()
+        sizes = batcher.batch_sizes
+        snap["avg_batch_size"] = float(np.mean(sizes)) if sizes else None
+        return jsonify(snap)
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        name = f"registry:{active.version}" if active is not None else model_name
+        return jsonify({"status": "ok", "model": name})
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço HTTP de escoragem online")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--compiled", default=COMPILED_PATH, help="artefato NumPy; passe '' para usar o sklearn")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--no-registry", action="store_true", help="ignora o registro e usa --model/--compiled")
+    parser.add_argument("--server", choices=["waitress", "dev"], default="waitress",
+                        help="waitress (produção, um processo) ou dev (servidor de desenvolvimento do Flask)")
+    parser.add_argument("--threads", type=int, default=32, help="threads do waitress")
+    args = parser.parse_args()
+    app = create_app(args.model, args.compiled, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                     use_registry=not args.no_registry)
+    if args.server == "waitress":
+        from waitress import serve
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,52 @@
+# src/sketches.py
+"""
+Sketch de quantis aproximado e combinável (mergeable), para estatísticas em streaming:
+- update(valores) acumula um chunk; merge(outro) junta sketches de chunks/processos diferentes
+- quantile(q) / median() retornam a estimativa
+- memória limitada a `size` centróides, independente do número de linhas
+"""
+import numpy as np
+
+class QuantileSketch:
+    def __init__(self, size=2048):
+        self.size = size
+        self.values = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0.0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        x = x[~np.isnan(x)]
+        if x.size:
+            self._add(x, np.ones(x.size))
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self._add(other.values, other.weights)
+        return self
+
+    def _add(self, values, weights):
+        values = np.concatenate([self.values, values])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(values, kind="mergesort")
+        values, weights = values[order], weights[order]
+        self.count = float(weights.sum())
+        if values.size > self.size:
+            # comprime em `size` centróides de peso ~igual (média ponderada por grupo)
+            cum = np.cumsum(weights)
+            group = np.minimum((cum - weights / 2) * self.size // self.count, self.size - 1).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+            w = np.add.reduceat(weights, starts)
+            values = np.add.reduceat(values * weights, starts) / w
+            weights = w
+        self.values, self.weights = values, weights
+
+    def quantile(self, q):
+        if not self.count:
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.count, centers, self.values))
+
+    def median(self):
+        return self.quantile(0.5)
@@ -0,0 +1,245 @@
+# src/storage.py
+"""
+Armazenamento colunar dos dados intermediários (data/processed, data/features):
+- Parquet (padrão) ou Feather via pyarrow, com compressão e tipos preservados
+  (ex.: age_bucket/score_bucket continuam category)
+- leitura com projeção de colunas (columns=[...]) para ler só o necessário
+- se pyarrow não estiver instalado, cai para CSV
+- bytes lidos/gravados são somados no span ativo (src/tracing.py)
+- leitura por faixa de linhas (read_rows) para dividir um arquivo entre processos,
+  e tabelas particionadas (diretório de partes, chave=valor/part-*.ext) lidas por load_table
+"""
+import os
+import pandas as pd
+
+import tracing
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except Exception:
+    pq = None
+    HAS_ARROW = False
+
+DEFAULT_FORMAT = "parquet" if HAS_ARROW else "csv"
+COMPRESSION = "zstd"
+ROW_GROUP_ROWS = 250_000  # row groups menores permitem ler faixas do arquivo em paralelo
+
+def table_path(base):
+    """
+    Caminho do arquivo para uma tabela (sem extensão) no formato padrão.
+    Ex.: table_path('data/features/loan_features') -> 'data/features/loan_features.parquet'
+    """
+    return f"{base}.{DEFAULT_FORMAT}"
+
+def _format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("parquet", "pq"):
+        return "parquet"
+    if ext in ("feather", "arrow"):
+        return "feather"
+    return "csv"
+
+def save_table(df, path):
+    """
+    Grava o DataFrame no formato indicado pela extensão do caminho.
+    """
+    fmt = _format(path)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression=COMPRESSION, row_group_size=ROW_GROUP_ROWS)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(path, compression=COMPRESSION)
+    else:
+        df.to_csv(path, index=False)
+    tracing.add(bytes_written=os.path.getsize(path), rows_written=len(df))
+    return path
+
+def table_columns(path):
+    """
+    Lista as colunas do arquivo sem carregar os dados.
+    """
+    fmt = _format(path)
+    if fmt == "parquet":
+        return list(pq.read_schema(path).names)
+    if fmt == "feather":
+        import pyarrow.feather as feather
+        return list(feather.read_table(path, memory_map=True).schema.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def part_files(path):
+    """
+    Arquivos de uma tabela particionada (diretório), em ordem, com as chaves de partição
+    tiradas dos subdiretórios chave=valor. Retorna [(arquivo, {chave: valor})].
+    """
+    parts = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        rel = os.path.relpath(root, path)
+        keys = dict(d.split("=", 1) for d in ([] if rel == "." else rel.split(os.sep)) if "=" in d)
+        for name in sorted(files):
+            if name.startswith("part-"):
+                parts.append((os.path.join(root, name), keys))
+    return parts
+
+def _key_value(value):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def load_table(path, columns=None):
+    """
+    Lê o arquivo; columns restringe a leitura às colunas pedidas (projeção).
+    Colunas pedidas que não existem no arquivo são ignoradas.
+    Um diretório é lido como tabela particionada (partes concatenadas; chaves viram colunas).
+    """
+    if os.path.isdir(path):
+        frames = []
+        for part, keys in part_files(path):
+            df = load_table(part, columns=columns)
+            for k, v in keys.items():
+                if columns is None or k in columns:
+                    df[k] = _key_value(v)
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    if columns is not None:
+        available = set(table_columns(path))
+        columns = [c for c in columns if c in available]
+    fmt = _format(path)
+    tracing.add(bytes_read=os.path.getsize(path))
+    if fmt == "parquet":
+        df = pd.read_parquet(path, columns=columns)
+    elif fmt == "feather":
+        df = pd.read_feather(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    tracing.add(rows_read=len(df))
+    return df
+
+def iter_table(path, columns=None, chunksize=500_000):
+    """
+    Lê o arquivo em chunks de até `chunksize` linhas (memória limitada).
+    Colunas pedidas que não existem no arquivo são ignoradas.
+    """
+    if columns is not None:
+        available = set(table_columns(path))
+        columns = [c for c in columns if c in available]
+    fmt = _format(path)
+    tracing.add(bytes_read=os.path.getsize(path))
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for start in range(0, table.num_rows, chunksize):
+            yield table.slice(start, chunksize).to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+def table_rows(path):
+    """
+    Número de linhas do arquivo sem carregar os dados (CSV: conta as linhas).
+    """
+    fmt = _format(path)
+    if fmt == "parquet":
+        return pq.ParquetFile(path).metadata.num_rows
+    if fmt == "feather":
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True).num_rows
+    with open(path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)  # menos o cabeçalho
+
+def row_ranges(path, target_rows):
+    """
+    Divide o arquivo em faixas [start, stop) de cerca de `target_rows` linhas.
+    Em Parquet as faixas seguem os limites dos row groups (cada faixa decodifica só os seus).
+    """
+    if _format(path) == "parquet":
+        meta = pq.ParquetFile(path).metadata
+        ranges, start, offset = [], 0, 0
+        for i in range(meta.num_row_groups):
+            offset += meta.row_group(i).num_rows
+            if offset - start >= target_rows:
+                ranges.append((start, offset))
+                start = offset
+        if offset > start:
+            ranges.append((start, offset))
+        return ranges
+    n = table_rows(path)
+    return [(start, min(start + target_rows, n)) for start in range(0, n, target_rows)]
+
+def read_rows(path, start, stop, columns=None):
+    """
+    Lê só as linhas [start, stop) do arquivo (índice start..stop-1).
+    Parquet decodifica apenas os row groups que cobrem a faixa.
+    """
+    if columns is not None:
+        available = set(table_columns(path))
+        columns = [c for c in columns if c in available]
+    fmt = _format(path)
+    if fmt == "parquet":
+        pf = pq.ParquetFile(path)
+        groups, first, offset = [], None, 0
+        for i in range(pf.metadata.num_row_groups):
+            n = pf.metadata.row_group(i).num_rows
+            if offset < stop and offset + n > start:
+                groups.append(i)
+                first = offset if first is None else first
+            offset += n
+        if not groups:
+            return pf.schema_arrow.empty_table().select(columns or pf.schema_arrow.names).to_pandas()
+        df = pf.read_row_groups(groups, columns=columns).slice(start - first, stop - start).to_pandas()
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+        df = feather.read_table(path, columns=columns, memory_map=True).slice(start, stop - start).to_pandas()
+    else:
+        df = pd.read_csv(path, usecols=columns, skiprows=range(1, start + 1), nrows=stop - start)
+    df.index = pd.RangeIndex(start, start + len(df))
+    tracing.add(rows_read=len(df))
+    return df
+
+class TableWriter:
+    """
+    Gravação incremental (chunk a chunk) para arquivos maiores que a memória.
+    Parquet usa ParquetWriter (um row group por chunk); CSV faz append.
+    Uso: with TableWriter(path) as w: w.write(chunk)
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fmt = _format(path)
+        if self.fmt == "feather":
+            raise ValueError("Feather não suporta gravação incremental; use .parquet ou .csv")
+        self._writer = None
+        self._schema = None
+        self._closed = False
+        self.rows = 0
+
+    def write(self, df):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression=COMPRESSION)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, index=False, mode="w" if self.rows == 0 else "a", header=self.rows == 0)
+        self.rows += len(df)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.rows and os.path.exists(self.path):
+            tracing.add(bytes_written=os.path.getsize(self.path), rows_written=self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,182 @@
+# src/text_features.py
+"""
+Features de risco derivadas de textos de clientes (transcrições de cobrança, mensagens):
+- escora o corpus em lote com o classificador PLN (pln.predict_texts), em chunks
+- agrega por contrato: quantidade de textos, fração com label negativo/reclamação,
+  média de entidades por texto e se o texto mais recente é negativo
+- as agregações ficam em disco como somas (mescláveis), então o modo incremental escora só os
+  textos novos desde a última execução (o corpus só recebe append) e soma o resultado ao acumulado;
+  o estado guarda o hash do vetorizador/classificador: retreinar o modelo PLN reescora tudo
+- join com a base tabular por hash (índice do contrato), ausentes viram 0
+Entrada: data/raw/textos_clientes.csv (colunas contrato, texto e, opcionalmente, data)
+Saída: data/features/text_aggregates.parquet
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import file_hash
+from data_processing import ID_COL
+from storage import iter_table, load_table, save_table, table_columns, table_path
+from tracing import span
+
+TEXTS_PATH = 'data/raw/textos_clientes.csv'
+TEXT_COL = 'texto'
+DATE_COL = 'data'
+AGG_PATH = table_path('data/features/text_aggregates')
+STATE_PATH = 'data/features/text_aggregates_state.json'
+CHUNK_SIZE = 100_000
+NEGATIVE_LABELS = ('negativo', 'reclamacao', 'reclamação', 'negative', 'complaint')
+
+TEXT_FEATURES = ['txt_n', 'txt_pct_negativo', 'txt_media_entidades', 'txt_ultimo_negativo']
+_AGG_COLS = [ID_COL, 'n', 'neg', 'entities', 'last_date', 'last_neg']
+
+def _load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with open(STATE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+def model_hashes():
+    """
+    Hash dos arquivos do modelo PLN (vetorizador, classificador) que escoram os textos.
+    """
+    import pln
+    return [file_hash(pln.VECT_PATH), file_hash(pln.CLF_PATH)]
+
+def score_chunk(chunk, negative_labels=NEGATIVE_LABELS, entities=True, n_process=1):
+    """
+    Escora um chunk (contrato, texto[, data]) e agrega por contrato.
+    Retorna DataFrame com as somas de _AGG_COLS.
+    """
+    import pln
+
+    with span("pln", rows_in=len(chunk)):
+        preds = pln.predict_texts(chunk[TEXT_COL].tolist(), entities=entities, n_process=n_process)
+    negative = {str(l).lower() for l in negative_labels}
+    scored = pd.DataFrame({
+        ID_COL: chunk[ID_COL].to_numpy(),
+        'neg': np.fromiter((str(p['label']).lower() in negative for p in preds), dtype=np.int64, count=len(preds)),
+        'entities': np.fromiter((len(p['entities']) for p in preds), dtype=np.int64, count=len(preds)),
+        # sem coluna de data, a ordem no arquivo define o mais recente
+        'last_date': (pd.to_datetime(chunk[DATE_COL], errors='coerce') if DATE_COL in chunk.columns
+                      else pd.Series(pd.NaT, index=chunk.index)).to_numpy(),
+    })
+    scored['n'] = 1
+    scored['_order'] = np.arange(len(scored))
+    return _reduce(scored)
+
+def _reduce(parts):
+    """
+    Combina agregações parciais: soma contagens e fica com o texto mais recente por contrato.
+    """
+    parts = parts.sort_values(['last_date', '_order'] if '_order' in parts.columns else ['last_date'],
+                              na_position='first', kind='mergesort')
+    if 'last_neg' not in parts.columns:
+        parts['last_neg'] = parts['neg']
+    g = parts.groupby(ID_COL, sort=False)
+    out = g[['n', 'neg', 'entities']].sum()
+    last = g[['last_date', 'last_neg']].last()  # last() ignora NaT; vale o último da ordem
+    out = out.join(last).reset_index()
+    return out[_AGG_COLS]
+
+def build_text_aggregates(texts_path=TEXTS_PATH, incremental=True, chunksize=CHUNK_SIZE,
+                          negative_labels=NEGATIVE_LABELS, entities=True, n_process=1):
+    """
+    Escora o corpus de textos e atualiza as agregações por contrato em AGG_PATH.
+    incremental: escora só os textos novos, as linhas após as já lidas na última execução
+                 (o corpus só recebe append; se encolher ou o modelo PLN mudar, tudo é reescorado).
+    Retorna o DataFrame de agregações (ou None se não houver corpus).
+    """
+    if not os.path.exists(texts_path):
+        print(f"Corpus de textos não encontrado em {texts_path}. Features de texto não geradas.")
+        return None
+    columns = [c for c in (ID_COL, TEXT_COL, DATE_COL) if c in table_columns(texts_path)]
+    if ID_COL not in columns or TEXT_COL not in columns:
+        raise ValueError(f"Corpus de textos precisa das colunas {ID_COL} e {TEXT_COL}.")
+
+    models = model_hashes()
+    state = _load_state() if incremental and os.path.exists(AGG_PATH) else {}
+    if state.get('source') != os.path.abspath(texts_path):
+        state = {}
+    elif state.get('models') != models:
+        # as somas acumuladas vêm de outro modelo: não dá para misturar com os escores novos
+        print("Modelo PLN mudou desde a última execução; reescorando todos os textos.")
+        state = {}
+    skip_rows = state.get('rows', 0)
+
+    parts = [load_table(AGG_PATH)] if state else []
+    new_rows, seen_rows = 0, 0
+    for chunk in iter_table(texts_path, columns=columns, chunksize=chunksize):
+        seen_rows += len(chunk)
+        if skip_rows:
+            drop = min(skip_rows, len(chunk))
+            chunk = chunk.iloc[drop:]
+            skip_rows -= drop
+        if not len(chunk):
+            continue
+        parts.append(score_chunk(chunk, negative_labels, entities, n_process))
+        new_rows += len(chunk)
+    if skip_rows:
+        # o arquivo tem menos linhas que na última execução: não é append, reescora tudo
+        print("Corpus de textos mudou (menos linhas que na última execução); reescorando tudo.")
+        return build_text_aggregates(texts_path, False, chunksize, negative_labels, entities, n_process)
+
+    if not parts:
+        print("Nenhum texto para escorar.")
+        return None
+    if new_rows or not state:
+        agg = _reduce(pd.concat(parts, ignore_index=True)) if len(parts) > 1 else parts[0]
+        save_table(agg, AGG_PATH)
+    else:
+        agg = parts[0]
+    _save_state({'source': os.path.abspath(texts_path), 'rows': seen_rows, 'models': models})
+    print(f"Textos escorados: {new_rows} novos; {len(agg)} contratos com textos -> {AGG_PATH}")
+    return agg
+
+def aggregate_features(agg):
+    """
+    Converte as somas em features numéricas (colunas TEXT_FEATURES), indexadas pelo contrato.
+    """
+    n = agg['n'].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        'txt_n': n,
+        'txt_pct_negativo': agg['neg'].to_numpy() / n,
+        'txt_media_entidades': agg['entities'].to_numpy() / n,
+        'txt_ultimo_negativo': agg['last_neg'].to_numpy(dtype=np.float64),
+    }, index=pd.Index(agg[ID_COL].to_numpy(), name=ID_COL))
+
+def join_text_features(df, agg, key=ID_COL, verbose=True):
+    """
+    Acrescenta TEXT_FEATURES ao df (hash join pelo contrato, preservando a ordem do df).
+    Contratos sem textos recebem 0.
+    """
+    feats = aggregate_features(agg)
+    pos = feats.index.get_indexer(df[key].to_numpy())
+    found = pos >= 0
+    out = df.copy()
+    for c in TEXT_FEATURES:
+        values = np.zeros(len(df), dtype=np.float32)
+        values[found] = feats[c].to_numpy()[pos[found]]
+        out[c] = values
+    if verbose:
+        print(f"Features de texto: {int(found.sum())} de {len(df)} contratos com textos")
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Agregações de textos de clientes por contrato")
+    parser.add_argument("--texts", default=TEXTS_PATH)
+    parser.add_argument("--full", action="store_true", help="reescora todo o corpus (ignora o estado incremental)")
+    parser.add_argument("--no-entities", action="store_true", help="não roda o NER (mais rápido)")
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+    build_text_aggregates(args.texts, incremental=not args.full, entities=not args.no_entities,
+                          n_process=args.n_process)
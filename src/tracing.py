@@ -0,0 +1,279 @@
+# src/tracing.py
+"""
+Instrumentação das etapas (spans) para relatórios estruturados de execução:
+- with span("nome"): mede tempo de parede, tempo de CPU e pico de memória no span,
+  e aceita contadores (linhas de entrada/saída, bytes lidos/gravados) via add()/set()
+- memória: por padrão, RSS do processo amostrado por uma thread (a cada RSS_SAMPLE_SECONDS), sem custo
+  nas etapas; peak_rss_mb é o pico absoluto e peak_mb o quanto ele subiu acima do RSS ao entrar no span.
+  memory=True (--trace-memory) troca peak_mb pelo tracemalloc (alocações Python/NumPy exatas),
+  que deixa o código várias vezes mais lento: use só para investigar memória, não para medir tempo
+- spans aninhados formam uma árvore: dá para ver qual passo, dentro de qual etapa, ficou lento
+- storage.py soma automaticamente os bytes lidos/gravados no span ativo
+- profile=True captura cProfile do span (arquivo .prof + funções mais caras no relatório)
+- fora de uma execução (start_run) os spans não registram nada e custam quase zero
+
+Uso:
+    tracer = start_run(profile=False)
+    with span("features", rows_in=len(df)) as sp:
+        ...
+        sp.set(rows_out=len(out))
+    finish_run().save("reports/run.json")
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_DIR = "reports/profiles"
+PROFILE_TOP = 15
+RSS_SAMPLE_SECONDS = 0.05
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+_local = threading.local()
+_tracer = None
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024, 1)  # macOS em bytes, Linux em KB
+
+def _rss_mb():
+    """
+    RSS atual do processo; sem /proc (macOS/Windows), o pico do processo via getrusage.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return _max_rss_mb()
+
+class Span:
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.counters = {}
+        self.children = []
+        self.seconds = None
+        self.cpu_seconds = None
+        self.peak_mb = None
+        self.peak_rss_mb = None
+        self.profile = None
+        self._child_peak = 0
+        self._rss_peak = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    def add(self, **counters):
+        for k, v in counters.items():
+            self.counters[k] = self.counters.get(k, 0) + v
+        return self
+
+    def to_dict(self):
+        d = {"name": self.name, "seconds": self.seconds, "cpu_seconds": self.cpu_seconds, "peak_mb": self.peak_mb,
+             "peak_rss_mb": self.peak_rss_mb}
+        d.update(self.attrs)
+        d.update(self.counters)
+        if self.profile:
+            d["profile"] = self.profile
+        if self.children:
+            d["children"] = [c.to_dict() for c in self.children]
+        return d
+
+class _NullSpan(Span):
+    """
+    Span usado fora de uma execução instrumentada: aceita set/add e não guarda nada.
+    """
+    def set(self, **attrs):
+        return self
+
+    def add(self, **counters):
+        return self
+
+_NULL = _NullSpan("-")
+
+class Tracer:
+    def __init__(self, memory=False, profile=False, profile_dir=PROFILE_DIR):
+        self.memory = memory
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.roots = []
+        self.seconds = None
+        self._t0 = time.perf_counter()
+        self._owns_tracemalloc = False
+        self._open = []  # spans abertos (de qualquer thread), atualizados pelo amostrador de RSS
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _sample(self):
+        rss = _rss_mb()
+        if rss is not None:
+            for sp in list(self._open):
+                sp._rss_peak = rss if sp._rss_peak is None else max(sp._rss_peak, rss)
+        return rss
+
+    def _sample_loop(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self._sample()
+
+    def report(self, **meta):
+        return {"run_id": self.run_id, "started_at": self.started_at, "seconds": self.seconds,
+                "memory": "tracemalloc" if self.memory else "rss", "max_rss_mb": _max_rss_mb(),
+                **meta, "spans": [s.to_dict() for s in self.roots]}
+
+    def save(self, path, **meta):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**meta), f, indent=2, ensure_ascii=False, default=str)
+        print(f"Relatório da execução salvo em: {path}")
+        return path
+
+def start_run(memory=False, profile=False, profile_dir=PROFILE_DIR):
+    """
+    Inicia uma execução instrumentada (os spans passam a ser registrados). Retorna o Tracer.
+    memory: se True, mede o pico dos spans com tracemalloc (lento); senão, pelo RSS amostrado.
+    """
+    global _tracer
+    _tracer = Tracer(memory=memory, profile=profile, profile_dir=profile_dir)
+    _local.stack = []
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracer._owns_tracemalloc = True
+    _tracer._sampler = threading.Thread(target=_tracer._sample_loop, name="rss-sampler", daemon=True)
+    _tracer._sampler.start()
+    return _tracer
+
+def finish_run():
+    """
+    Encerra a execução instrumentada e devolve o Tracer (com a árvore de spans).
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.seconds = round(time.perf_counter() - tracer._t0, 4)
+        tracer._stop.set()
+        if tracer._sampler is not None and tracer._sampler.is_alive():
+            tracer._sampler.join()
+        if tracer._owns_tracemalloc:
+            tracemalloc.stop()
+    _local.stack = []
+    return tracer
+
+def active():
+    return _tracer
+
+def current():
+    """
+    Span ativo nesta thread (ou um span nulo).
+    """
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if _tracer is not None and stack else _NULL
+
+def add(**counters):
+    current().add(**counters)
+
+def _profile_summary(prof, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    prof.dump_stats(path)
+    stats = pstats.Stats(prof, stream=io.StringIO()).sort_stats("cumulative")
+    top = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in list(stats.stats.items()):
+        top.append({"function": f"{os.path.basename(filename)}:{line}({func})", "calls": nc,
+                    "tottime": round(tt, 4), "cumtime": round(ct, 4)})
+    top.sort(key=lambda r: r["cumtime"], reverse=True)
+    return {"file": path, "top": top[:PROFILE_TOP]}
+
+@contextmanager
+def span(name, profile=None, **attrs):
+    """
+    Mede um trecho. profile: None = segue o Tracer (só spans de primeiro nível), True/False força.
+    peak_mb: pico acima da entrada (tracemalloc com memory=True; senão RSS amostrado, que não cai
+    quando o alocador segura memória já liberada e pode perder picos mais curtos que a amostragem).
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield _NULL
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    sp = Span(name, attrs)
+    parent = stack[-1] if stack else None
+    (parent.children if parent else tracer.roots).append(sp)
+
+    memory = tracer.memory and tracemalloc.is_tracing()
+    if memory:
+        if parent is not None:
+            # o reset abaixo apagaria o pico que o pai já atingiu: guarda antes
+            parent._child_peak = max(parent._child_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    do_profile = tracer.profile and parent is None if profile is None else profile
+    prof = None
+    if do_profile:
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # outro profiler já ativo
+            prof = None
+    stack.append(sp)
+    tracer._open.append(sp)
+    rss0 = tracer._sample()
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        yield sp
+    finally:
+        sp.seconds = round(time.perf_counter() - t0, 4)
+        sp.cpu_seconds = round(time.process_time() - c0, 4)
+        stack.pop()
+        tracer._sample()
+        tracer._open.remove(sp)
+        if sp._rss_peak is not None:
+            sp.peak_rss_mb = round(sp._rss_peak, 1)
+            if parent is not None:
+                parent._rss_peak = max(parent._rss_peak or 0, sp._rss_peak)
+            if not memory and rss0 is not None:
+                sp.peak_mb = round(max(sp._rss_peak - rss0, 0), 1)
+        if prof is not None:
+            prof.disable()
+            sp.profile = _profile_summary(prof, os.path.join(tracer.profile_dir, tracer.run_id, f"{name}.prof"))
+        if memory:
+            peak = max(sp._child_peak, tracemalloc.get_traced_memory()[1])
+            sp.peak_mb = round(max(peak - base, 0) / 1024 ** 2, 1)
+            if parent is not None:
+                parent._child_peak = max(parent._child_peak, peak)
+
+def traced(name=None, **span_kwargs):
+    """
+    Decorator: executa a função dentro de um span (nome padrão: nome da função).
+    """
+    def deco(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label, **span_kwargs):
+                return func(*args, **kwargs)
+        return wrapper
+    return deco
@@ -0,0 +1,124 @@
+# src/what_if.py
+"""
+Análise what-if para o dashboard:
+- risk_grid(base, x, valores_x[, y, valores_y]): risco em uma grade de cenários (ex.: score × renda
+  com o valor financiado fixo), calculado em uma única predição vetorizada
+- scenario_risk(base): risco de um cenário (uma linha), pelo mesmo caminho e com o mesmo cache
+- resultados memorizados em um cache LRU limitado (GRID_CACHE_SIZE entradas), com chave
+  (versão do modelo, entradas): treinar/ativar outra versão invalida sozinho o que foi calculado
+- o modelo de cada versão é carregado uma vez: escorador NumPy compilado quando existe
+  (sem pandas/sklearn por predição), senão o pipeline sklearn
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+import registry
+from compiled_scorer import COMPILED_PATH, CompiledScorer
+
+MODEL_PATH = "models/model_pipeline_noleak.pkl"
+GRID_CACHE_SIZE = 512
+
+# grades padrão por variável (mesmos limites das entradas do dashboard)
+GRID_AXES = {
+    'renda': np.linspace(0, 30000, 61),
+    'idade': np.arange(16, 81, 2),
+    'score': np.linspace(0, 1000, 41),
+    'valor': np.linspace(0, 200000, 41),
+    'meses_em_atraso': np.arange(0, 25),
+}
+
+_models = {}  # versão -> modelo (só a última: trocar de versão libera a anterior)
+
+def current_version():
+    """
+    Versão do modelo em uso: a ativa no registro ou, sem registro, o pkl local (identificado pelo mtime).
+    """
+    version = registry.active_version()
+    if version is not None:
+        return version
+    if os.path.exists(MODEL_PATH):
+        return f"local-{os.stat(MODEL_PATH).st_mtime_ns}"
+    return None
+
+def load_model(version=None):
+    """
+    Modelo da versão (padrão: a atual), carregado uma vez por processo.
+    """
+    version = version or current_version()
+    if version is None:
+        raise FileNotFoundError(f"Nenhum modelo treinado ({MODEL_PATH} ou registro). Rode main.py primeiro.")
+    if version not in _models:
+        _models.clear()
+        if version.startswith("local-"):
+            if os.path.exists(COMPILED_PATH):
+                model = CompiledScorer(COMPILED_PATH)
+            else:
+                import joblib
+                model = joblib.load(MODEL_PATH)
+        elif os.path.isdir(registry.compiled_dir(version)):
+            model = CompiledScorer(registry.compiled_dir(version))
+        else:
+            model = registry.load_pipeline(version)
+        _models[version] = model
+    return _models[version]
+
+def score_scenarios(model, columns):
+    """
+    Probabilidade de inadimplência para {coluna processada: array}; features de texto ausentes valem 0.
+    """
+    if isinstance(model, CompiledScorer):
+        return model.score_raw(columns)
+    import pandas as pd
+    from scoring import SCORE_COL, score_frame
+    return score_frame(pd.DataFrame(columns), model=model)[SCORE_COL].to_numpy()
+
+@lru_cache(maxsize=GRID_CACHE_SIZE)
+def _risk_grid(version, base, x_col, x_values, y_col, y_values):
+    xs = np.asarray(x_values, dtype=np.float64)
+    ys = np.asarray(y_values, dtype=np.float64) if y_col else np.zeros(1)
+    X, Y = np.meshgrid(xs, ys)  # (len(y), len(x))
+    columns = {c: np.full(X.size, v) for c, v in base}
+    columns[x_col] = X.ravel()
+    if y_col:
+        columns[y_col] = Y.ravel()
+    proba = np.asarray(score_scenarios(load_model(version), columns), dtype=np.float64).reshape(X.shape)
+    if not y_col:
+        proba = proba[0]
+    proba.setflags(write=False)  # o mesmo array é devolvido a cada acerto no cache
+    return proba
+
+def risk_grid(base, x_col, x_values, y_col=None, y_values=None, version=None):
+    """
+    Risco em cada combinação de x_values (e y_values) com as demais variáveis fixas em base.
+    base: {coluna processada: valor} (renda, idade, score, valor, meses_em_atraso)
+    Retorna array (len(x_values),) ou, com y, (len(y_values), len(x_values)); somente leitura.
+    """
+    version = version or current_version()
+    # as variáveis da grade saem da chave: a curva de renda não muda quando só a renda de base muda
+    key = tuple(sorted((c, float(v)) for c, v in base.items() if c not in (x_col, y_col)))
+    return _risk_grid(version, key, x_col, tuple(float(v) for v in x_values),
+                      y_col, tuple(float(v) for v in y_values) if y_col else None)
+
+def scenario_risk(base, version=None):
+    """
+    Risco de um único cenário (base com todas as variáveis).
+    """
+    col = next(iter(base))
+    return float(risk_grid(base, col, [base[col]], version=version)[0])
+
+def sensitivity(base, columns=None, version=None):
+    """
+    Curvas de sensibilidade: para cada variável, o risco ao longo de GRID_AXES com as demais fixas.
+    Retorna {coluna: (valores, riscos)}.
+    """
+    return {c: (GRID_AXES[c], risk_grid(base, c, GRID_AXES[c], version=version))
+            for c in (columns or GRID_AXES)}
+
+def cache_info():
+    return _risk_grid.cache_info()
+
+def clear_cache():
+    _risk_grid.cache_clear()
+    _models.clear()
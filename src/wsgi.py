@@ -0,0 +1,28 @@
+# src/wsgi.py
+"""
+Entrada WSGI do serviço de escoragem (src/serving.py) para servidores de produção.
+O servidor de desenvolvimento do Flask não serve para produção; use gunicorn (Linux) ou waitress:
+
+  gunicorn --pythonpath src -c src/gunicorn.conf.py wsgi:app
+  PYTHONPATH=src waitress-serve --threads 32 --port 8000 wsgi:app
+
+Cada processo do servidor tem o seu modelo e o seu MicroBatcher; as threads de um processo
+compartilham o micro-lote. Configuração por variáveis de ambiente (padrões iguais aos de serving.py):
+  SCORING_MODEL, SCORING_COMPILED ('' = pipeline sklearn), SCORING_MAX_BATCH, SCORING_MAX_WAIT_MS,
+  SCORING_NO_REGISTRY=1 (ignora o registro de modelos)
+"""
+import os
+
+import serving
+from model import COMPILED_PATH, MODEL_PATH
+
+def create_app():
+    return serving.create_app(
+        model_path=os.environ.get("SCORING_MODEL", MODEL_PATH),
+        compiled_path=os.environ.get("SCORING_COMPILED", COMPILED_PATH),
+        max_batch=int(os.environ.get("SCORING_MAX_BATCH", serving.MAX_BATCH)),
+        max_wait_ms=float(os.environ.get("SCORING_MAX_WAIT_MS", serving.MAX_WAIT_MS)),
+        use_registry=os.environ.get("SCORING_NO_REGISTRY", "") != "1",
+    )
+
+app = create_app()
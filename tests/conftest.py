@@ -0,0 +1,5 @@
+import os
+import sys
+
+# os módulos de src/ importam uns aos outros pelo nome (como em main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,80 @@
+# tests/test_compiled_scorer.py
+"""
+O escorador NumPy (compiled_scorer.CompiledScorer) tem que reproduzir o predict_proba do pipeline
+sklearn, tanto pelo .npz quanto pelo diretório de .npy em memory-map do registro.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+import dtypes
+from compiled_scorer import CompiledScorer, save_arrays
+from feature_engineering import FEATURES, compute_features
+from feature_transformer import FeatureTransformer
+from model import CATEGORICAL_FEATURES, NUMERIC_FEATURES, build_preprocessor, export_compiled
+
+BASE = ['renda', 'idade', 'score', 'valor', 'meses_em_atraso']
+# sem corpus de textos: só as features tabulares (como em model.train)
+NUMERIC = [c for c in NUMERIC_FEATURES if c in FEATURES]
+
+def _processed(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'renda': rng.lognormal(8, 0.6, n),
+        'idade': rng.integers(18, 75, n).astype(float),
+        'score': rng.uniform(300, 990, n),
+        'valor': rng.uniform(1000, 150000, n),
+        'meses_em_atraso': rng.integers(0, 6, n).astype(float),
+    })
+    z = 0.00002 * df['valor'] - 0.004 * df['score'] - 0.0002 * df['renda'] + rng.normal(0, 1, n)
+    df['target'] = (z > np.median(z)).astype(int)
+    return dtypes.apply(df, dtypes.PROCESSED_DTYPES)
+
+def _edge_cases():
+    # NaN, renda zero e valores fora das faixas dos buckets (idade/score abaixo, acima e na borda)
+    return pd.DataFrame({
+        'renda':           [np.nan, 0.0,    0.0,   3500.0, 1200.0, np.nan, 8000.0],
+        'idade':           [30.0,   np.nan, 10.0,  120.0,  0.0,    55.0,   100.0],
+        'score':           [600.0,  700.0,  -5.0,  1200.0, np.nan, 0.0,    1000.0],
+        'valor':           [5000.0, 9000.0, np.nan, 20000.0, 0.0,  15000.0, 50000.0],
+        'meses_em_atraso': [0.0,    2.0,    np.nan, 5.0,    0.0,    1.0,    0.0],
+    }).astype(np.float32)
+
+@pytest.fixture(scope="module")
+def fitted():
+    train = _processed(2000, seed=0)
+    transformer = FeatureTransformer().fit(train)
+    feats = compute_features(train, transformer=transformer)
+    clf = Pipeline(steps=[("pre", build_preprocessor(NUMERIC, CATEGORICAL_FEATURES)),
+                          ("clf", LogisticRegression(max_iter=1000, class_weight="balanced"))])
+    clf.fit(feats[NUMERIC + CATEGORICAL_FEATURES], feats['target'])
+    clf.feature_transformer_ = transformer
+    return clf
+
+def _sklearn_proba(clf, df):
+    X = compute_features(df, transformer=clf.feature_transformer_)[NUMERIC + CATEGORICAL_FEATURES]
+    X = X.astype({c: np.float64 for c in NUMERIC})
+    return clf.predict_proba(X)[:, 1]
+
+@pytest.mark.parametrize("layout", ["npz", "mmap"])
+def test_compiled_matches_predict_proba(fitted, tmp_path, layout):
+    path = str(tmp_path / "model_compiled.npz")
+    arrays = export_compiled(fitted, path)
+    if layout == "mmap":
+        path = save_arrays(arrays, str(tmp_path / "compiled"))
+    scorer = CompiledScorer(path)
+
+    # dados processados (float32, como em data/processed): os dois caminhos veem as mesmas entradas
+    df = pd.concat([_processed(500, seed=1), _edge_cases()], ignore_index=True)
+    expected = _sklearn_proba(fitted, df)
+    got = scorer.score_raw({c: df[c].to_numpy() for c in BASE})
+    assert np.isfinite(got).all()
+    assert np.allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+def test_edge_cases_hit_unknown_buckets(fitted):
+    feats = compute_features(_edge_cases(), transformer=fitted.feature_transformer_)
+    # as linhas fora das faixas ficam sem bucket (categoria desconhecida no one-hot)
+    assert feats['age_bucket'].isna().sum() >= 3
+    assert feats['score_bucket'].isna().sum() >= 3
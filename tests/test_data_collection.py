@@ -0,0 +1,115 @@
+# tests/test_data_collection.py
+"""
+Coleta das séries SGS contra um stand-in local da API (http.server em uma thread):
+busca em paralelo, cache em disco, atualização incremental e retry após 503.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+import data_collection
+
+START = "2024-01-01"
+
+class FakeSGS:
+    """
+    Serve /serie/<id>/dados como a API do SGS: observações diárias entre dataInicial e dataFinal.
+    Registra as requisições e quantas estavam em andamento ao mesmo tempo.
+    """
+    def __init__(self, last_date="2024-01-10", delay=0.0):
+        self.last_date = pd.Timestamp(last_date)
+        self.delay = delay
+        self.fail_first = set()   # séries cuja primeira requisição devolve 503
+        self.requests = []        # (série, dataInicial, status)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handle(self, handler):
+        url = urlparse(handler.path)
+        series_id = url.path.split("/")[2]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            first = all(s != series_id for s, _, _ in self.requests)
+            status = 503 if first and series_id in self.fail_first else 200
+            self.requests.append((series_id, query["dataInicial"], status))
+        try:
+            time.sleep(self.delay)
+            if status != 200:
+                handler.send_response(status)
+                handler.end_headers()
+                return
+            start = pd.Timestamp(pd.to_datetime(query["dataInicial"], dayfirst=True))
+            end = min(pd.Timestamp(pd.to_datetime(query["dataFinal"], dayfirst=True)), self.last_date)
+            dates = pd.date_range(start, end, freq="D") if start <= end else []
+            body = pd.DataFrame({"data": [d.strftime("%d/%m/%Y") for d in dates],
+                                 "valor": [f"{10 + d.day},{int(series_id) % 100:02d}" for d in dates]})
+            payload = body.to_json(orient="records").encode()
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+@pytest.fixture
+def sgs():
+    fake = FakeSGS()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            fake.handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.base_url = f"http://127.0.0.1:{server.server_port}/serie/{{series_id}}/dados"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+def _fetch(sgs, tmp_path, series_ids):
+    return data_collection.fetch_macros(series_ids, start_date=START, base_url=sgs.base_url,
+                                        cache_dir=str(tmp_path))
+
+def test_fetch_concurrent(sgs, tmp_path):
+    sgs.delay = 0.3
+    out = _fetch(sgs, tmp_path, ["432", "433", "434"])
+    assert sgs.max_in_flight >= 2
+    assert {s: len(df) for s, df in out.items()} == {"432": 10, "433": 10, "434": 10}
+    assert out["433"]["valor"].iloc[0] == pytest.approx(11.33)
+
+def test_cache_file(sgs, tmp_path):
+    _fetch(sgs, tmp_path, ["432"])
+    cached = pd.read_csv(tmp_path / "sgs_432.csv", parse_dates=["data"])
+    assert list(cached.columns) == ["data", "valor"]
+    assert cached["data"].min() == pd.Timestamp(START)
+    assert cached["data"].max() == pd.Timestamp("2024-01-10")
+
+def test_second_run_is_incremental(sgs, tmp_path):
+    _fetch(sgs, tmp_path, ["432"])
+    sgs.last_date = pd.Timestamp("2024-01-15")
+    sgs.requests.clear()
+    out = _fetch(sgs, tmp_path, ["432"])
+    # só as datas depois da última observação em cache
+    assert [(s, start) for s, start, _ in sgs.requests] == [("432", "11/01/2024")]
+    df = out["432"]
+    assert len(df) == 15 and df["data"].is_unique and df["data"].is_monotonic_increasing
+    assert len(pd.read_csv(tmp_path / "sgs_432.csv")) == 15
+
+def test_retry_after_503(sgs, tmp_path):
+    sgs.fail_first.add("432")
+    out = _fetch(sgs, tmp_path, ["432"])
+    assert [status for _, _, status in sgs.requests] == [503, 200]
+    assert len(out["432"]) == 10
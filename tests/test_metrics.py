@@ -0,0 +1,126 @@
+# tests/test_metrics.py
+"""
+Métricas de uma única ordenação (src/metrics.py) contra as referências: roc_auc_score/roc_curve do
+sklearn e as definições antigas de KS e lift (ordenação linha a linha com pandas), com e sem empates.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score, roc_curve
+
+from metrics import bootstrap_metrics, evaluate, gains_table, ks_statistic, lift_at_k
+
+# definições anteriores (model.py), linha a linha
+def old_ks(y_true, y_scores):
+    df = pd.DataFrame({"y": y_true, "s": y_scores})
+    df = df.sort_values("s", ascending=False).reset_index(drop=True)
+    df["cum_event"] = (df["y"] == 1).cumsum()
+    df["cum_nonevent"] = (df["y"] == 0).cumsum()
+    total_event = df["y"].sum()
+    total_nonevent = (df["y"] == 0).sum()
+    if total_event == 0 or total_nonevent == 0:
+        return np.nan
+    df["cum_event_pct"] = df["cum_event"] / total_event
+    df["cum_nonevent_pct"] = df["cum_nonevent"] / total_nonevent
+    return float((df["cum_event_pct"] - df["cum_nonevent_pct"]).abs().max())
+
+def old_lift(y_true, y_scores, k=0.1):
+    df = pd.DataFrame({"y": y_true, "s": y_scores})
+    df = df.sort_values("s", ascending=False).reset_index(drop=True)
+    top_n = int(len(df) * k)
+    if top_n == 0 or df["y"].mean() == 0:
+        return np.nan
+    top = df.iloc[:top_n]
+    return float(top["y"].mean() / df["y"].mean())
+
+def tied_lift(y, s, k):
+    """
+    Lift com empates: o grupo de score que cruza o corte entra com a sua taxa de eventos.
+    """
+    y, s = np.asarray(y, dtype=float), np.asarray(s, dtype=float)
+    top = np.floor(k * len(y))
+    events, taken = 0.0, 0
+    for v in np.unique(s)[::-1]:
+        g = y[s == v]
+        take = min(len(g), top - taken)
+        events += take * g.mean()
+        taken += take
+        if taken >= top:
+            break
+    return (events / top) / y.mean()
+
+def _data(n, seed, ties):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, n)
+    s = rng.normal(y * 0.8, 1.0)
+    if ties:
+        s = np.round(s, 1)  # poucos valores distintos: muitos empates, inclusive no corte do lift
+    return y, s
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_auc_matches_sklearn(ties):
+    y, s = _data(5000, 0, ties)
+    m = evaluate(y, s)
+    assert m["auc"] == pytest.approx(roc_auc_score(y, s), abs=1e-12)
+    assert m["gini"] == pytest.approx(2 * roc_auc_score(y, s) - 1, abs=1e-12)
+
+def test_ks_and_lift_match_old_definitions_without_ties():
+    y, s = _data(5000, 1, ties=False)
+    m = evaluate(y, s)
+    assert m["ks"] == pytest.approx(old_ks(y, s), abs=1e-12)
+    for k in (0.05, 0.1, 0.2):
+        assert m[f"lift{int(k * 100)}"] == pytest.approx(old_lift(y, s, k), abs=1e-12)
+    assert ks_statistic(y, s) == m["ks"]
+    assert lift_at_k(y, s, 0.1) == m["lift10"]
+
+def test_ks_and_lift_with_ties():
+    y, s = _data(5000, 2, ties=True)
+    m = evaluate(y, s)
+    # KS só nos cortes entre scores distintos (como na curva ROC); a definição antiga também
+    # avaliava no meio de um grupo empatado, em uma ordem arbitrária, então fica acima ou igual
+    fpr, tpr, _ = roc_curve(y, s)
+    assert m["ks"] == pytest.approx(np.abs(tpr - fpr).max(), abs=1e-12)
+    assert m["ks"] <= old_ks(y, s) + 1e-12
+    for k in (0.05, 0.1, 0.2):
+        assert m[f"lift{int(k * 100)}"] == pytest.approx(tied_lift(y, s, k), abs=1e-12)
+
+def test_all_tied_scores():
+    y = np.array([1, 0, 0, 1, 0, 0, 0, 1, 0, 0])
+    m = evaluate(y, np.full(len(y), 0.5))
+    assert m["auc"] == pytest.approx(0.5)
+    assert m["ks"] == pytest.approx(0.0)
+    assert m["lift10"] == pytest.approx(1.0)  # sem ordenação possível, o topo tem a taxa média
+
+@pytest.mark.parametrize("y, s", [([], []), (np.array([], dtype=int), np.array([], dtype=float))])
+def test_empty_input_is_nan(y, s):
+    m = evaluate(y, s)
+    assert set(m) == {"auc", "ks", "gini", "lift5", "lift10", "lift20"}
+    assert all(np.isnan(v) for v in m.values())
+    assert np.isnan(ks_statistic(y, s))
+    assert np.isnan(lift_at_k(y, s))
+    assert bootstrap_metrics(y, s) == {}
+
+def test_single_class_is_nan():
+    s = np.linspace(0, 1, 50)
+    m = evaluate(np.zeros(50, dtype=int), s)
+    assert all(np.isnan(v) for v in m.values())
+    m = evaluate(np.ones(50, dtype=int), s)
+    assert np.isnan(m["auc"]) and np.isnan(m["ks"]) and np.isnan(m["gini"])
+    assert m["lift10"] == pytest.approx(old_lift(np.ones(50), s, 0.1))  # todos eventos: lift 1
+    ci = bootstrap_metrics(np.zeros(50, dtype=int), s, n_boot=20)
+    assert np.isnan(ci["auc"]["estimate"]) and np.isnan(ci["auc"]["lower"]) and np.isnan(ci["ks"]["upper"])
+
+def test_bootstrap_estimate_and_interval():
+    y, s = _data(2000, 3, ties=True)
+    m = evaluate(y, s)
+    ci = bootstrap_metrics(y, s, n_boot=100, max_cells=50_000)  # vários blocos de réplicas
+    for k, v in m.items():
+        assert ci[k]["estimate"] == pytest.approx(v)
+        assert ci[k]["lower"] <= v <= ci[k]["upper"]
+
+def test_gains_table_totals():
+    y, s = _data(1000, 4, ties=True)
+    g = gains_table(y, s)
+    assert g["cum_events"][-1] == pytest.approx(y.sum())
+    assert g["cum_capture"][-1] == pytest.approx(1.0)
+    assert g["cum_lift"][-1] == pytest.approx(1.0)
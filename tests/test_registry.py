@@ -0,0 +1,33 @@
+# tests/test_registry.py
+"""
+Retenção do registro de modelos: prune() mantém as versões mais recentes e nunca apaga a ativa.
+"""
+import os
+
+import pytest
+
+import registry
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # caminhos do registro são relativos (models/registry)
+    names = [f"v20260101-12000{i}" for i in range(6)]
+    for v in names:
+        os.makedirs(registry.version_dir(v))
+    return names
+
+def test_prune_keeps_most_recent(versions):
+    registry.set_active(versions[-1])
+    removed = registry.prune(keep=2)
+    assert removed == versions[:4]
+    assert registry.list_versions() == versions[4:]
+
+def test_prune_never_removes_active(versions):
+    registry.set_active(versions[0])
+    registry.prune(keep=2)
+    assert registry.list_versions() == [versions[0]] + versions[4:]
+    assert registry.active_version() == versions[0]
+
+def test_prune_rejects_zero(versions):
+    with pytest.raises(ValueError):
+        registry.prune(keep=0)
@@ -0,0 +1,69 @@
+# tests/test_scoring.py
+"""
+Escoragem em lote (scoring.score_file): arquivo processado é escorado; arquivo sem as colunas
+processadas (ex.: CSV bruto) falha com erro que diz quais colunas faltam.
+"""
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+import scoring
+from feature_engineering import FEATURES, compute_features
+from feature_transformer import FeatureTransformer
+from model import CATEGORICAL_FEATURES, NUMERIC_FEATURES, build_preprocessor
+
+NUMERIC = [c for c in NUMERIC_FEATURES if c in FEATURES]
+
+def _processed(n=300):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'contrato': np.arange(n),
+        'renda': rng.uniform(1000, 9000, n),
+        'idade': rng.integers(18, 75, n).astype(float),
+        'score': rng.uniform(300, 990, n),
+        'valor': rng.uniform(1000, 90000, n),
+        'meses_em_atraso': np.zeros(n),
+        'target': rng.integers(0, 2, n),
+    })
+
+@pytest.fixture
+def model_path(tmp_path):
+    df = _processed()
+    transformer = FeatureTransformer().fit(df)
+    feats = compute_features(df, transformer=transformer)
+    clf = Pipeline(steps=[("pre", build_preprocessor(NUMERIC, CATEGORICAL_FEATURES)),
+                          ("clf", LogisticRegression(max_iter=1000))])
+    clf.fit(feats[NUMERIC + CATEGORICAL_FEATURES], feats['target'])
+    clf.feature_transformer_ = transformer
+    path = str(tmp_path / "model.pkl")
+    joblib.dump(clf, path)
+    scoring._model = None
+    yield path
+    scoring._model = None
+
+def test_score_processed_file(model_path, tmp_path):
+    df = _processed().drop(columns=['target', 'meses_em_atraso'])  # opcionais na escoragem
+    df.to_csv(tmp_path / "in.csv", index=False)
+    report = scoring.score_file(str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), id_col='contrato',
+                                model_path=model_path)
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert report["rows"] == len(df) == len(out)
+    assert list(out.columns) == ['contrato', scoring.SCORE_COL]
+    assert out[scoring.SCORE_COL].between(0, 1).all()
+
+def test_unprocessed_file_names_missing_columns(model_path, tmp_path):
+    raw = pd.DataFrame({'LoanID': [1, 2], 'income': [1000, 2000], 'Age': [30, 40],
+                        'CreditScore': [600, 700], 'LoanAmount': [5000, 9000]})
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+    with pytest.raises(ValueError, match=r"\['renda', 'idade', 'score', 'valor'\]"):
+        scoring.score_file(str(tmp_path / "raw.csv"), str(tmp_path / "out.csv"), model_path=model_path)
+    assert not (tmp_path / "out.csv").exists()
+
+def test_missing_id_col(model_path, tmp_path):
+    _processed().to_csv(tmp_path / "in.csv", index=False)
+    with pytest.raises(ValueError, match="id_cliente"):
+        scoring.score_file(str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), id_col='id_cliente',
+                           model_path=model_path)